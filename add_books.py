@@ -99,22 +99,28 @@ BOOKS_DATA = [
 ]
 
 async def add_books():
-    print("Starting to add dummy books...")
+    print(f"Importing {len(BOOKS_DATA)} books through the bulk import endpoint...")
+    body = "\n".join(json.dumps(book_data) for book_data in BOOKS_DATA)
     async with httpx.AsyncClient() as client:
-        for i, book_data in enumerate(BOOKS_DATA):
-            print(f"Adding book {i+1}/{len(BOOKS_DATA)}: {book_data['title']}")
-            try:
-                response = await client.post(BASE_URL, json=book_data)
-                response.raise_for_status()  # Raise an HTTPStatusError for bad responses (4xx or 5xx)
-                print(f"Successfully added book: {book_data['title']}")
-            except httpx.HTTPStatusError as e:
-                print(f"Error adding book {book_data['title']}: Client error '{e.response.status_code} {e.response.reason_phrase}' for url '{e.request.url}'")
-                print(f"Response content: {e.response.text}")
-            except httpx.RequestError as e:
-                print(f"Error adding book {book_data['title']}: An error occurred while requesting {e.request.url!r}.")
-            except Exception as e:
-                print(f"An unexpected error occurred while adding book {book_data['title']}: {e}")
+        try:
+            response = await client.post(
+                BASE_URL + "import",
+                content=body,
+                headers={"Content-Type": "application/x-ndjson"}
+            )
+            response.raise_for_status()  # Raise an HTTPStatusError for bad responses (4xx or 5xx)
+            summary = response.json()
+            print(f"Inserted: {summary['inserted']}, updated: {summary['updated']}, rejected: {summary['rejected']}")
+            for error in summary["errors"]:
+                print(f"Line {error['line']}: {error['error']}")
+        except httpx.HTTPStatusError as e:
+            print(f"Error importing books: Client error '{e.response.status_code} {e.response.reason_phrase}' for url '{e.request.url}'")
+            print(f"Response content: {e.response.text}")
+        except httpx.RequestError as e:
+            print(f"Error importing books: An error occurred while requesting {e.request.url!r}.")
+        except Exception as e:
+            print(f"An unexpected error occurred while importing books: {e}")
     print("Finished adding dummy books!")
 
 if __name__ == "__main__":
-    asyncio.run(add_books()) 
\ No newline at end of file
+    asyncio.run(add_books())
\ No newline at end of file
@@ -0,0 +1,129 @@
+"""Initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# Frozen copies of the generated column expressions at this revision
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(author, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(category, '')), 'C') || "
+    "setweight(to_tsvector('english', coalesce(book_description, '')), 'D')"
+)
+SEARCH_TEXT_SQL = "name || ' ' || roll_number || ' ' || phone"
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.execute("""
+        CREATE TABLE books (
+            id SERIAL PRIMARY KEY,
+            title VARCHAR NOT NULL,
+            author VARCHAR NOT NULL,
+            isbn VARCHAR UNIQUE NOT NULL,
+            copies INTEGER NOT NULL,
+            available_copies INTEGER NOT NULL,
+            category VARCHAR NOT NULL,
+            book_description VARCHAR,
+            search_vector TSVECTOR GENERATED ALWAYS AS (""" + SEARCH_VECTOR_SQL + """) STORED,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    op.execute("""
+        CREATE TABLE students (
+            id SERIAL PRIMARY KEY,
+            name VARCHAR NOT NULL,
+            roll_number VARCHAR UNIQUE NOT NULL,
+            department VARCHAR NOT NULL,
+            semester INTEGER NOT NULL,
+            phone VARCHAR UNIQUE NOT NULL,
+            email VARCHAR UNIQUE NOT NULL,
+            search_text VARCHAR GENERATED ALWAYS AS (""" + SEARCH_TEXT_SQL + """) STORED,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    op.execute("""
+        CREATE TABLE issues (
+            id SERIAL PRIMARY KEY,
+            student_id INTEGER NOT NULL,
+            issue_date TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            return_date TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            actual_return_date TIMESTAMP WITHOUT TIME ZONE,
+            is_overdue BOOLEAN DEFAULT FALSE,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    op.execute("""
+        CREATE TABLE issue_items (
+            id SERIAL PRIMARY KEY,
+            issue_id INTEGER NOT NULL REFERENCES issues(id) ON DELETE CASCADE,
+            book_id INTEGER NOT NULL REFERENCES books(id),
+            book_title VARCHAR NOT NULL,
+            returned_at TIMESTAMP WITHOUT TIME ZONE,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    op.execute("""
+        CREATE TABLE notifications (
+            id SERIAL PRIMARY KEY,
+            issue_id INTEGER NOT NULL REFERENCES issues(id) ON DELETE CASCADE,
+            kind VARCHAR NOT NULL DEFAULT 'due_reminder',
+            reminder_date DATE NOT NULL,
+            to_email VARCHAR NOT NULL,
+            subject VARCHAR NOT NULL,
+            body VARCHAR NOT NULL,
+            status VARCHAR NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            last_error VARCHAR,
+            sent_at TIMESTAMP WITHOUT TIME ZONE,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            CONSTRAINT uq_notifications_issue_kind_date UNIQUE (issue_id, kind, reminder_date)
+        )
+    """)
+
+    op.execute("CREATE INDEX ix_books_title_id ON books (title, id)")
+    op.execute("CREATE INDEX ix_books_search_vector ON books USING gin (search_vector)")
+    op.execute("CREATE INDEX ix_books_title_trgm ON books USING gin (title gin_trgm_ops)")
+    op.execute("CREATE INDEX ix_books_author_trgm ON books USING gin (author gin_trgm_ops)")
+    op.execute("CREATE INDEX ix_students_search_text_trgm ON students USING gin (search_text gin_trgm_ops)")
+    op.execute(
+        "CREATE INDEX ix_issues_open_return_date ON issues (return_date) WHERE actual_return_date IS NULL"
+    )
+    op.execute("CREATE INDEX ix_issues_student_issue_date ON issues (student_id, issue_date DESC)")
+    op.execute("CREATE INDEX ix_issue_items_issue_id ON issue_items (issue_id)")
+    op.execute("CREATE INDEX ix_issue_items_book_id ON issue_items (book_id)")
+    op.execute(
+        "CREATE INDEX ix_issue_items_active_book_id ON issue_items (book_id, issue_id) WHERE returned_at IS NULL"
+    )
+    op.execute(
+        "CREATE INDEX ix_notifications_pending ON notifications (next_attempt_at) WHERE status = 'pending'"
+    )
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS notifications")
+    op.execute("DROP TABLE IF EXISTS issue_items")
+    op.execute("DROP TABLE IF EXISTS issues")
+    op.execute("DROP TABLE IF EXISTS students")
+    op.execute("DROP TABLE IF EXISTS books")
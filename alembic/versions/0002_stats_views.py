@@ -0,0 +1,56 @@
+"""Materialized views for library statistics
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # IF NOT EXISTS: databases adopted at 0001 may already have these views
+    op.execute("""
+        CREATE MATERIALIZED VIEW IF NOT EXISTS stats_books_by_category AS
+        SELECT category,
+               count(*) AS titles,
+               coalesce(sum(copies), 0) AS total_copies,
+               coalesce(sum(available_copies), 0) AS available_copies
+        FROM books
+        GROUP BY category
+    """)
+    op.execute("CREATE UNIQUE INDEX IF NOT EXISTS uq_stats_books_by_category ON stats_books_by_category (category)")
+
+    op.execute("""
+        CREATE MATERIALIZED VIEW IF NOT EXISTS stats_students_by_department AS
+        SELECT department, count(*) AS students
+        FROM students
+        GROUP BY department
+    """)
+    op.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_stats_students_by_department ON stats_students_by_department (department)"
+    )
+
+    op.execute("""
+        CREATE MATERIALIZED VIEW IF NOT EXISTS stats_circulation AS
+        SELECT 1 AS id,
+               (SELECT count(*) FROM issues WHERE actual_return_date IS NULL) AS active_issues,
+               (SELECT count(*) FROM issue_items WHERE returned_at IS NULL) AS books_out,
+               (SELECT count(*) FROM issues
+                WHERE actual_return_date IS NULL
+                  AND return_date < (now() AT TIME ZONE 'utc')) AS overdue_issues,
+               (now() AT TIME ZONE 'utc') AS refreshed_at
+    """)
+    op.execute("CREATE UNIQUE INDEX IF NOT EXISTS uq_stats_circulation ON stats_circulation (id)")
+
+
+def downgrade():
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS stats_circulation")
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS stats_students_by_department")
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS stats_books_by_category")
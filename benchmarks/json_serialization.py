@@ -0,0 +1,106 @@
+"""Rows per second for list responses: default FastAPI path vs src.serialization.
+
+The default path mirrors what FastAPI does with ``response_model``: validate
+ORM objects through Pydantic (``from_attributes``), dump them in JSON mode and
+encode with the standard library. The fast path is what the routers run when
+FAST_JSON_ROUTERS covers them: ``fields_dicts`` reads the schema fields off
+the objects (the books router caches exactly these dicts) and
+``FastJSONResponse`` encodes them with orjson (or json when it is missing).
+
+    python benchmarks/json_serialization.py --rows 10000 --repeat 5
+
+No database is needed; rows are in-memory ORM instances.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydantic import TypeAdapter  # noqa: E402
+from src.models.book import Book  # noqa: E402
+from src.models.student import Student  # noqa: E402
+from src.schemas.book import Book as BookSchema  # noqa: E402
+from src.schemas.issue import AdminIssue  # noqa: E402
+from src.schemas.student import Student as StudentSchema  # noqa: E402
+from src.serialization import FastJSONResponse, fields_dicts, orjson  # noqa: E402
+
+
+def make_books(count: int) -> list:
+    return [
+        Book(
+            id=i, title=f"Book title {i}", author=f"Author {i % 500}", isbn=f"978-{i:010d}",
+            copies=5, available_copies=i % 6, category=f"Category {i % 20}"
+        )
+        for i in range(count)
+    ]
+
+
+def make_students(count: int) -> list:
+    return [
+        Student(
+            id=i, name=f"Student {i}", roll_number=f"CS{i:07d}", department="Computer Science",
+            semester=i % 8 + 1, phone=f"{i:010d}", email=f"student{i}@example.com"
+        )
+        for i in range(count)
+    ]
+
+
+def make_overdue(count: int) -> list:
+    now = datetime(2026, 1, 1)
+    return [
+        {
+            "id": i, "student_id": i % 1000, "book_ids": [i % 300, i % 301], "books_titles": "A, B",
+            "issue_date": now - timedelta(days=30), "return_date": now - timedelta(days=16),
+            "actual_return_date": None, "is_overdue": True, "days_overdue": 16,
+        }
+        for i in range(count)
+    ]
+
+
+def default_path(rows, schema) -> bytes:
+    adapter = TypeAdapter(List[schema])
+    validated = adapter.validate_python(rows, from_attributes=True)
+    return json.dumps(adapter.dump_python(validated, mode="json")).encode()
+
+
+def fast_path(rows, schema) -> bytes:
+    return FastJSONResponse(fields_dicts(rows, schema)).body
+
+
+def measure(fn, rows, schema, repeat: int) -> float:
+    fn(rows, schema)  # warm up
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(rows, schema)
+        best = min(best, time.perf_counter() - started)
+    return len(rows) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"encoder: {'orjson ' + orjson.__version__ if orjson else 'json (orjson not installed)'}")
+    print(f"{'payload':<10} {'default rows/s':>15} {'fast rows/s':>15} {'speedup':>8}")
+    cases = [
+        ("books", make_books(args.rows), BookSchema),
+        ("students", make_students(args.rows), StudentSchema),
+        ("overdue", make_overdue(args.rows), AdminIssue),
+    ]
+    for name, rows, schema in cases:
+        assert json.loads(default_path(rows[:50], schema)) == json.loads(fast_path(rows[:50], schema))
+        before = measure(default_path, rows, schema, args.repeat)
+        after = measure(fast_path, rows, schema, args.repeat)
+        print(f"{name:<10} {before:>15,.0f} {after:>15,.0f} {after / before:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
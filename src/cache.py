@@ -0,0 +1,197 @@
+import hashlib
+from abc import ABC, abstractmethod
+import importlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional
+from .config import get_settings
+
+settings = get_settings()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    sets: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+
+class CacheBackend(ABC):
+    """Interface for cache stores.
+
+    Methods are async so a shared network cache (Redis, memcached) can be
+    dropped in by pointing CACHE_BACKEND at ``"package.module:ClassName"``.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str):
+        ...
+
+    @abstractmethod
+    async def incr(self, key: str) -> int:
+        ...
+
+    @abstractmethod
+    async def counter(self, key: str) -> int:
+        ...
+
+    def stats(self) -> dict:
+        return {}
+
+
+class NullCache(CacheBackend):
+    """Stores nothing; used when caching is switched off."""
+
+    async def get(self, key: str) -> Optional[Any]:
+        return None
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        pass
+
+    async def delete(self, key: str):
+        pass
+
+    async def incr(self, key: str) -> int:
+        return 0
+
+    async def counter(self, key: str) -> int:
+        return 0
+
+
+class InMemoryCache(CacheBackend):
+    """Per-process LRU cache with a TTL on every entry.
+
+    Invalidations only reach this process, so with several workers other
+    workers may serve an entry until its TTL runs out.
+    """
+
+    def __init__(self, max_entries: int = 1024, default_ttl: float = 30):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.metrics = CacheStats()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._counters = {}
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.metrics.misses += 1
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._entries[key]
+            self.metrics.expirations += 1
+            self.metrics.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.metrics.hits += 1
+        return value
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        self.metrics.sets += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.metrics.evictions += 1
+
+    async def delete(self, key: str):
+        self._entries.pop(key, None)
+
+    async def incr(self, key: str) -> int:
+        # Counters live outside the LRU so they are never evicted
+        self._counters[key] = self._counters.get(key, 0) + 1
+        return self._counters[key]
+
+    async def counter(self, key: str) -> int:
+        return self._counters.get(key, 0)
+
+    def stats(self) -> dict:
+        lookups = self.metrics.hits + self.metrics.misses
+        return {
+            "backend": "memory",
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "default_ttl": self.default_ttl,
+            "hits": self.metrics.hits,
+            "misses": self.metrics.misses,
+            "hit_ratio": round(self.metrics.hits / lookups, 3) if lookups else 0.0,
+            "sets": self.metrics.sets,
+            "evictions": self.metrics.evictions,
+            "expirations": self.metrics.expirations,
+        }
+
+
+def _load_backend(name: str) -> CacheBackend:
+    if name == "memory":
+        return InMemoryCache(settings.CACHE_MAX_ENTRIES, settings.CACHE_TTL_SECONDS)
+    if name == "none":
+        return NullCache()
+    module_name, _, class_name = name.partition(":")
+    backend = getattr(importlib.import_module(module_name), class_name)
+    if not (isinstance(backend, type) and issubclass(backend, CacheBackend)):
+        raise TypeError(f"CACHE_BACKEND {name} is not a CacheBackend subclass")
+    # Instantiating raises TypeError if an abstract method is left unimplemented
+    return backend()
+
+
+cache: CacheBackend = _load_backend(settings.CACHE_BACKEND)
+
+
+# Book catalog keys. Lists are keyed by a generation number that any book
+# write bumps, so one increment retires every cached page and filter. Each
+# book also has its own generation, bumped when that book changes.
+BOOK_LIST_GENERATION = "books:list:generation"
+BOOK_ITEM_GENERATION = "books:item:generation"
+
+
+def _book_generation_key(book_id: int) -> str:
+    return f"books:item:generation:{book_id}"
+
+
+async def book_key(book_id: int) -> str:
+    """Cache key for one book; compute it before reading the database."""
+    generation = await cache.counter(BOOK_ITEM_GENERATION)
+    return f"books:item:{generation}:{book_id}:{await cache.counter(_book_generation_key(book_id))}"
+
+
+async def book_list_key(params: dict) -> str:
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+    return f"books:list:{await cache.counter(BOOK_LIST_GENERATION)}:{digest}"
+
+
+async def invalidate_books(book_ids: Iterable[int]):
+    """Retire cached copies of these books and every cached book list.
+
+    The keys move to a new generation instead of only being deleted: a
+    reader that missed before the write already holds the old key, so its
+    late store lands where nobody looks any more.
+    """
+    for book_id in set(book_ids):
+        stale = await book_key(book_id)
+        await cache.incr(_book_generation_key(book_id))
+        await cache.delete(stale)
+    await cache.incr(BOOK_LIST_GENERATION)
+
+
+async def invalidate_all_books():
+    await cache.incr(BOOK_ITEM_GENERATION)
+    await cache.incr(BOOK_LIST_GENERATION)
+
+
+def get_cache_stats() -> dict:
+    return cache.stats()
@@ -0,0 +1,186 @@
+import codecs
+import csv
+import json
+import asyncpg
+from typing import AsyncIterator, List, Optional, Tuple
+from pydantic import ValidationError
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..config import get_settings
+from ..schemas.book import BookImportRow, BookImportError, BookImportResult
+
+settings = get_settings()
+
+IMPORT_COLUMNS = ("title", "author", "isbn", "copies", "category", "book_description")
+
+CREATE_STAGING_TABLE = """
+    CREATE TEMP TABLE books_import_staging (
+        title VARCHAR NOT NULL,
+        author VARCHAR NOT NULL,
+        isbn VARCHAR NOT NULL,
+        copies INTEGER NOT NULL,
+        category VARCHAR NOT NULL,
+        book_description VARCHAR
+    ) ON COMMIT DROP
+"""
+
+# Existing titles keep their outstanding loans: available copies move by the
+# change in total copies. xmax = 0 only holds for freshly inserted rows.
+UPSERT_FROM_STAGING = """
+    INSERT INTO books (title, author, isbn, copies, available_copies, category, book_description)
+    SELECT title, author, isbn, copies, copies, category, book_description
+    FROM books_import_staging
+    ON CONFLICT (isbn) DO UPDATE SET
+        title = EXCLUDED.title,
+        author = EXCLUDED.author,
+        category = EXCLUDED.category,
+        book_description = EXCLUDED.book_description,
+        available_copies = GREATEST(books.available_copies + EXCLUDED.copies - books.copies, 0),
+        copies = EXCLUDED.copies,
+        updated_at = now()
+    RETURNING (xmax = 0) AS inserted
+"""
+
+# (line number, parsed row or None, error or None)
+ParsedRow = Tuple[int, Optional[dict], Optional[str]]
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, str]]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    line_no = 0
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            line_no += 1
+            yield line_no, line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield line_no + 1, buffer.rstrip("\r")
+
+
+async def iter_csv_rows(lines: AsyncIterator[Tuple[int, str]]) -> AsyncIterator[ParsedRow]:
+    header = None
+    pending = None
+    start = 0
+    async for line_no, line in lines:
+        if pending is None:
+            pending, start = line, line_no
+        else:
+            pending += "\n" + line
+        # An odd number of quotes means a quoted field continues on the next line
+        if pending.count('"') % 2:
+            continue
+        record, pending = pending, None
+        if not record.strip():
+            continue
+        values = next(csv.reader([record]))
+        if header is None:
+            header = [column.strip() for column in values]
+            continue
+        if len(values) != len(header):
+            yield start, None, f"expected {len(header)} columns, got {len(values)}"
+            continue
+        yield start, dict(zip(header, values)), None
+    if pending is not None:
+        yield start, None, "unterminated quoted field"
+
+
+async def iter_ndjson_rows(lines: AsyncIterator[Tuple[int, str]]) -> AsyncIterator[ParsedRow]:
+    async for line_no, line in lines:
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            yield line_no, None, f"invalid JSON: {e}"
+            continue
+        if not isinstance(data, dict):
+            yield line_no, None, "expected a JSON object"
+            continue
+        yield line_no, data, None
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}"
+        for item in error.errors()
+    )
+
+
+async def _copy_batch(db: AsyncSession, records: List[tuple]) -> Tuple[int, int]:
+    connection = await db.connection()
+    raw_connection = await connection.get_raw_connection()
+    await db.execute(text(CREATE_STAGING_TABLE))
+    await raw_connection.driver_connection.copy_records_to_table(
+        "books_import_staging", records=records, columns=IMPORT_COLUMNS
+    )
+    result = await db.execute(text(UPSERT_FROM_STAGING))
+    flags = result.scalars().all()
+    await db.commit()
+    inserted = sum(1 for flag in flags if flag)
+    return inserted, len(flags) - inserted
+
+
+async def import_book_rows(db: AsyncSession, rows: AsyncIterator[ParsedRow]) -> BookImportResult:
+    """Validate rows as they stream in and upsert them on isbn in COPY batches.
+
+    Invalid rows are counted and reported by line without stopping the
+    import; every batch is committed on its own. A batch the database
+    refuses is split in halves until the offending rows are isolated.
+    """
+    summary = BookImportResult()
+    seen_isbns = set()
+    batch: List[tuple] = []
+    batch_lines: List[int] = []
+
+    def reject(line_no: int, message: str):
+        summary.rejected += 1
+        if len(summary.errors) < settings.BOOK_IMPORT_MAX_ERRORS:
+            summary.errors.append(BookImportError(line=line_no, error=message))
+
+    async def load(records: List[tuple], lines: List[int]):
+        try:
+            inserted, updated = await _copy_batch(db, records)
+        except (DBAPIError, asyncpg.PostgresError) as e:
+            await db.rollback()
+            if len(records) == 1:
+                reject(lines[0], str(getattr(e, "orig", None) or e).splitlines()[0])
+                return
+            # Bisect so only the rows the database refuses are rejected
+            middle = len(records) // 2
+            await load(records[:middle], lines[:middle])
+            await load(records[middle:], lines[middle:])
+        else:
+            summary.inserted += inserted
+            summary.updated += updated
+
+    async def flush():
+        await load(list(batch), list(batch_lines))
+        batch.clear()
+        batch_lines.clear()
+
+    async for line_no, data, error in rows:
+        if error:
+            reject(line_no, error)
+            continue
+        data = {key: (value if value != "" else None) for key, value in data.items()}
+        try:
+            book = BookImportRow.model_validate(data)
+        except ValidationError as e:
+            reject(line_no, _validation_message(e))
+            continue
+        if book.isbn in seen_isbns:
+            reject(line_no, f"duplicate isbn {book.isbn} in upload")
+            continue
+        seen_isbns.add(book.isbn)
+        batch.append(tuple(getattr(book, column) for column in IMPORT_COLUMNS))
+        batch_lines.append(line_no)
+        if len(batch) >= settings.BOOK_IMPORT_BATCH_SIZE:
+            await flush()
+
+    if batch:
+        await flush()
+    return summary
@@ -0,0 +1,159 @@
+"""Read-only database diagnostics with bounded output.
+
+Every function returns at most ``DEBUG_MAX_ROWS`` rows and truncates long
+text values, so no single call can load a whole table into memory.
+"""
+from sqlalchemy import select, text, func, tablesample
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..config import get_settings
+from ..models import Book, Student, Issue, IssueItem, Notification
+
+settings = get_settings()
+
+# Tables that may be browsed row by row
+DIAGNOSTIC_TABLES = {
+    "books": Book,
+    "students": Student,
+    "issues": Issue,
+    "issue_items": IssueItem,
+    "notifications": Notification,
+}
+
+TABLE_SIZES = text("""
+    SELECT c.relname AS name,
+           CASE c.relkind WHEN 'm' THEN 'materialized view' ELSE 'table' END AS kind,
+           CAST(greatest(coalesce(s.n_live_tup, 0), c.reltuples, 0) AS BIGINT) AS estimated_rows,
+           pg_total_relation_size(c.oid) AS total_bytes,
+           pg_relation_size(c.oid) AS table_bytes,
+           pg_indexes_size(c.oid) AS index_bytes,
+           pg_size_pretty(pg_total_relation_size(c.oid)) AS total_size
+    FROM pg_class AS c
+    JOIN pg_namespace AS n ON n.oid = c.relnamespace
+    LEFT JOIN pg_stat_user_tables AS s ON s.relid = c.oid
+    WHERE n.nspname = 'public' AND c.relkind IN ('r', 'p', 'm')
+    ORDER BY pg_total_relation_size(c.oid) DESC
+    LIMIT :limit
+""")
+
+# Least used indexes first; large indexes with no scans are candidates to drop
+INDEX_USAGE = text("""
+    SELECT s.relname AS table_name,
+           s.indexrelname AS index_name,
+           s.idx_scan AS scans,
+           s.idx_tup_read AS tuples_read,
+           s.idx_tup_fetch AS tuples_fetched,
+           pg_relation_size(s.indexrelid) AS size_bytes,
+           pg_size_pretty(pg_relation_size(s.indexrelid)) AS size,
+           i.indisunique AS is_unique
+    FROM pg_stat_user_indexes AS s
+    JOIN pg_index AS i ON i.indexrelid = s.indexrelid
+    WHERE s.schemaname = 'public'
+    ORDER BY s.idx_scan, pg_relation_size(s.indexrelid) DESC
+    LIMIT :limit
+""")
+
+# Dead tuples left by updates and deletes, as counted by the statistics
+# collector; a high dead ratio means vacuum is falling behind
+TABLE_BLOAT = text("""
+    SELECT relname AS table_name,
+           n_live_tup AS live_tuples,
+           n_dead_tup AS dead_tuples,
+           round(CAST(n_dead_tup AS NUMERIC) / nullif(n_live_tup + n_dead_tup, 0), 3) AS dead_ratio,
+           last_vacuum,
+           last_autovacuum,
+           last_analyze,
+           last_autoanalyze
+    FROM pg_stat_user_tables
+    WHERE schemaname = 'public'
+    ORDER BY n_dead_tup DESC
+    LIMIT :limit
+""")
+
+STATEMENT_ORDERS = {
+    "total": "total_exec_time",
+    "mean": "mean_exec_time",
+    "calls": "calls",
+}
+
+
+def max_rows(limit: int) -> int:
+    return max(1, min(limit, settings.DEBUG_MAX_ROWS))
+
+
+def bounded_value(value):
+    if isinstance(value, str) and len(value) > settings.DEBUG_MAX_VALUE_CHARS:
+        return value[:settings.DEBUG_MAX_VALUE_CHARS] + "..."
+    return value
+
+
+def bounded_rows(rows) -> list:
+    return [{key: bounded_value(value) for key, value in row.items()} for row in rows]
+
+
+def table_columns(table) -> list:
+    # Search vectors are large and unreadable; leave them out
+    return [column for column in table.columns if not isinstance(column.type, TSVECTOR)]
+
+
+async def table_sizes(session: AsyncSession, limit: int = 100) -> list:
+    result = await session.execute(TABLE_SIZES, {"limit": max_rows(limit)})
+    return [dict(row) for row in result.mappings()]
+
+
+async def index_usage(session: AsyncSession, limit: int = 100) -> list:
+    result = await session.execute(INDEX_USAGE, {"limit": max_rows(limit)})
+    return [dict(row) for row in result.mappings()]
+
+
+async def table_bloat(session: AsyncSession, limit: int = 100) -> list:
+    result = await session.execute(TABLE_BLOAT, {"limit": max_rows(limit)})
+    return [dict(row) for row in result.mappings()]
+
+
+async def sample_rows(session: AsyncSession, model, size: int, estimated_rows: int) -> list:
+    """Roughly random rows without scanning the table.
+
+    TABLESAMPLE SYSTEM picks whole pages, so it oversamples tenfold and
+    trims with LIMIT.
+    """
+    size = max_rows(size)
+    percent = 100.0 if estimated_rows <= 0 else min(100.0, size * 10 * 100.0 / estimated_rows)
+    sampled = tablesample(model.__table__, func.system(percent))
+    columns = [sampled.c[column.name] for column in table_columns(model.__table__)]
+    result = await session.execute(select(*columns).limit(size))
+    return bounded_rows(result.mappings())
+
+
+async def slow_statements(session: AsyncSession, limit: int = 20, order: str = "total") -> dict:
+    """Most expensive statements from pg_stat_statements, if it is available."""
+    installed = await session.scalar(
+        text("SELECT count(*) FROM pg_extension WHERE extname = 'pg_stat_statements'")
+    )
+    if not installed:
+        return {
+            "available": False,
+            "detail": "pg_stat_statements is not installed; add it to shared_preload_libraries "
+                      "and run CREATE EXTENSION pg_stat_statements",
+            "statements": [],
+        }
+
+    try:
+        result = await session.execute(text(f"""
+            SELECT queryid, calls, rows,
+                   round(CAST(total_exec_time AS NUMERIC), 2) AS total_ms,
+                   round(CAST(mean_exec_time AS NUMERIC), 2) AS mean_ms,
+                   round(CAST(max_exec_time AS NUMERIC), 2) AS max_ms,
+                   shared_blks_hit, shared_blks_read,
+                   query
+            FROM pg_stat_statements
+            WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
+            ORDER BY {STATEMENT_ORDERS[order]} DESC
+            LIMIT :limit
+        """), {"limit": max_rows(limit)})
+    except DBAPIError as e:
+        # Installed but not preloaded, or an older server without *_exec_time columns
+        await session.rollback()
+        return {"available": False, "detail": str(e.orig).strip(), "statements": []}
+    return {"available": True, "detail": None, "statements": bounded_rows(result.mappings())}
@@ -1,8 +1,9 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from .session import AsyncSessionLocal
-from ..models.book import Book
-from ..models.student import Student
+from .stats import create_stats_views, drop_stats_views
+from ..models.book import Book, SEARCH_VECTOR_SQL
+from ..models.student import Student, SEARCH_TEXT_SQL
 from ..models.issue import Issue
 from datetime import datetime, timedelta, timezone
 from sqlalchemy.sql import select
@@ -37,8 +38,22 @@ async def init_db():
             print(f"Error during initialization: {str(e)}")  # Debug log
             raise e
 
+async def create_schema():
+    """Create whatever tables, indexes and views are missing; existing data is kept."""
+    async with AsyncSessionLocal() as session:
+        await create_tables(session)
+
 async def drop_tables(session: AsyncSession):
+    await drop_stats_views(session)
+    await session.commit()
+
     # Drop tables in correct order (respecting foreign key constraints)
+    await session.execute(text("DROP TABLE IF EXISTS notifications CASCADE"))
+    await session.commit()
+    
+    await session.execute(text("DROP TABLE IF EXISTS issue_items CASCADE"))
+    await session.commit()
+    
     await session.execute(text("DROP TABLE IF EXISTS issue_details CASCADE"))
     await session.commit()
     
@@ -67,6 +82,7 @@ async def create_tables(session: AsyncSession):
             available_copies INTEGER NOT NULL,
             category VARCHAR NOT NULL,
             book_description VARCHAR,
+            search_vector TSVECTOR GENERATED ALWAYS AS (""" + SEARCH_VECTOR_SQL + """) STORED,
             created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
             updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
         )
@@ -82,6 +98,7 @@ async def create_tables(session: AsyncSession):
             semester INTEGER NOT NULL,
             phone VARCHAR UNIQUE NOT NULL,
             email VARCHAR UNIQUE NOT NULL,
+            search_text VARCHAR GENERATED ALWAYS AS (""" + SEARCH_TEXT_SQL + """) STORED,
             created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
             updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
         )
@@ -92,8 +109,6 @@ async def create_tables(session: AsyncSession):
         CREATE TABLE IF NOT EXISTS issues (
             id SERIAL PRIMARY KEY,
             student_id INTEGER NOT NULL,
-            book_ids INTEGER[] NOT NULL,
-            books_titles VARCHAR NOT NULL,
             issue_date TIMESTAMP WITHOUT TIME ZONE NOT NULL,
             return_date TIMESTAMP WITHOUT TIME ZONE NOT NULL,
             actual_return_date TIMESTAMP WITHOUT TIME ZONE,
@@ -103,9 +118,98 @@ async def create_tables(session: AsyncSession):
         )
     """))
     
+    # Create issue line items, one row per book on an issue
+    await session.execute(text("""
+        CREATE TABLE IF NOT EXISTS issue_items (
+            id SERIAL PRIMARY KEY,
+            issue_id INTEGER NOT NULL REFERENCES issues(id) ON DELETE CASCADE,
+            book_id INTEGER NOT NULL REFERENCES books(id),
+            book_title VARCHAR NOT NULL,
+            returned_at TIMESTAMP WITHOUT TIME ZONE,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """))
+
+    # Create notifications outbox table
+    await session.execute(text("""
+        CREATE TABLE IF NOT EXISTS notifications (
+            id SERIAL PRIMARY KEY,
+            issue_id INTEGER NOT NULL REFERENCES issues(id) ON DELETE CASCADE,
+            kind VARCHAR NOT NULL DEFAULT 'due_reminder',
+            reminder_date DATE NOT NULL,
+            to_email VARCHAR NOT NULL,
+            subject VARCHAR NOT NULL,
+            body VARCHAR NOT NULL,
+            status VARCHAR NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            last_error VARCHAR,
+            sent_at TIMESTAMP WITHOUT TIME ZONE,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            CONSTRAINT uq_notifications_issue_kind_date UNIQUE (issue_id, kind, reminder_date)
+        )
+    """))
+
+    await create_indexes(session)
+    await create_stats_views(session)
+
     await session.commit()
     print("Tables created and committed")  # Debug log
 
+async def create_indexes(session: AsyncSession):
+    await session.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
+    # Keyset pagination order for book listings
+    await session.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_books_title_id ON books (title, id)"
+    ))
+
+    # Book search: full-text ranking plus trigram indexes so that
+    # leading-wildcard ILIKE filters on title/author avoid a sequential scan
+    await session.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_books_search_vector ON books USING gin (search_vector)"
+    ))
+    await session.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_books_title_trgm ON books USING gin (title gin_trgm_ops)"
+    ))
+    await session.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_books_author_trgm ON books USING gin (author gin_trgm_ops)"
+    ))
+
+    # Open issues by due date, and a student's history newest first
+    await session.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_issues_open_return_date ON issues (return_date) "
+        "WHERE actual_return_date IS NULL"
+    ))
+    await session.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_issues_student_issue_date ON issues (student_id, issue_date DESC)"
+    ))
+
+    # Issue line items by issue and by book
+    await session.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_issue_items_issue_id ON issue_items (issue_id)"
+    ))
+    await session.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_issue_items_book_id ON issue_items (book_id)"
+    ))
+    await session.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_issue_items_active_book_id ON issue_items (book_id, issue_id) "
+        "WHERE returned_at IS NULL"
+    ))
+
+    # Outbox rows waiting for delivery
+    await session.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_notifications_pending ON notifications (next_attempt_at) "
+        "WHERE status = 'pending'"
+    ))
+
+    # Student search over name, roll number and phone
+    await session.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_students_search_text_trgm ON students USING gin (search_text gin_trgm_ops)"
+    ))
+
 async def add_initial_data(session: AsyncSession):
     """Add initial data to the database."""
     try:
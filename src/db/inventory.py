@@ -0,0 +1,46 @@
+from collections import Counter
+from typing import List
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Set-based inventory changes: the guard and the write happen in one
+# statement, so concurrent checkouts can never push a title below zero.
+RESERVE_COPIES = text("""
+    UPDATE books AS b
+    SET available_copies = b.available_copies - r.quantity,
+        updated_at = now()
+    FROM unnest(CAST(:book_ids AS INTEGER[]), CAST(:quantities AS INTEGER[])) AS r(book_id, quantity)
+    WHERE b.id = r.book_id AND b.available_copies >= r.quantity
+    RETURNING b.id
+""")
+
+RELEASE_COPIES = text("""
+    UPDATE books AS b
+    SET available_copies = LEAST(b.copies, b.available_copies + r.quantity),
+        updated_at = now()
+    FROM unnest(CAST(:book_ids AS INTEGER[]), CAST(:quantities AS INTEGER[])) AS r(book_id, quantity)
+    WHERE b.id = r.book_id
+    RETURNING b.id
+""")
+
+
+def _params(quantities: Counter) -> dict:
+    book_ids = sorted(quantities)
+    return {"book_ids": book_ids, "quantities": [quantities[book_id] for book_id in book_ids]}
+
+
+async def reserve_copies(db: AsyncSession, quantities: Counter) -> List[int]:
+    """Take ``quantities[book_id]`` copies of each book.
+
+    Returns the IDs that could not be reserved; the caller must roll back
+    if any are returned.
+    """
+    result = await db.execute(RESERVE_COPIES, _params(quantities))
+    reserved = set(result.scalars().all())
+    return [book_id for book_id in sorted(quantities) if book_id not in reserved]
+
+
+async def release_copies(db: AsyncSession, quantities: Counter) -> List[int]:
+    """Put copies back on the shelf, never above the total copy count."""
+    result = await db.execute(RELEASE_COPIES, _params(quantities))
+    return sorted(result.scalars().all())
@@ -0,0 +1,108 @@
+"""Move issues.book_ids / issues.books_titles into the issue_items table.
+
+Run once against an existing database with ``python -m src.db.migrate_issue_items``.
+It is idempotent: issues that already have items are skipped, and the old
+columns are only dropped after every issue has been copied.
+"""
+import asyncio
+import sys
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from .session import AsyncSessionLocal
+
+CREATE_ISSUE_ITEMS = text("""
+    CREATE TABLE IF NOT EXISTS issue_items (
+        id SERIAL PRIMARY KEY,
+        issue_id INTEGER NOT NULL REFERENCES issues(id) ON DELETE CASCADE,
+        book_id INTEGER NOT NULL REFERENCES books(id),
+        book_title VARCHAR NOT NULL,
+        returned_at TIMESTAMP WITHOUT TIME ZONE,
+        created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+""")
+
+# The old return endpoint removed each returned book from book_ids, so only
+# books still out can be copied: closed issues get no items and the record of
+# which books they held is lost. Titles come from the books table because
+# books_titles was sorted and de-duplicated and cannot be lined up with ids.
+# Ids of books that no longer exist cannot satisfy the foreign key; they are
+# reported by FIND_MISSING_BOOKS before anything is copied.
+BACKFILL_ISSUE_ITEMS = text("""
+    INSERT INTO issue_items (issue_id, book_id, book_title, returned_at, created_at, updated_at)
+    SELECT i.id, item.book_id, b.title, i.actual_return_date, i.created_at, i.updated_at
+    FROM issues AS i
+    CROSS JOIN LATERAL unnest(i.book_ids) WITH ORDINALITY AS item(book_id, position)
+    JOIN books AS b ON b.id = item.book_id
+    WHERE NOT EXISTS (SELECT 1 FROM issue_items AS ii WHERE ii.issue_id = i.id)
+    ORDER BY i.id, item.position
+""")
+
+
+FIND_MISSING_BOOKS = text("""
+    SELECT i.id AS issue_id, item.book_id
+    FROM issues AS i
+    CROSS JOIN LATERAL unnest(i.book_ids) AS item(book_id)
+    WHERE NOT EXISTS (SELECT 1 FROM books AS b WHERE b.id = item.book_id)
+      AND NOT EXISTS (SELECT 1 FROM issue_items AS ii WHERE ii.issue_id = i.id)
+    ORDER BY i.id, item.book_id
+""")
+
+
+class MissingBooksError(RuntimeError):
+    def __init__(self, missing):
+        self.missing = missing
+        super().__init__(
+            f"{len(missing)} issued book ids no longer exist in books; rerun with "
+            f"--skip-missing to migrate without them"
+        )
+
+
+async def _has_array_columns(session: AsyncSession) -> bool:
+    result = await session.execute(text("""
+        SELECT count(*) FROM information_schema.columns
+        WHERE table_name = 'issues' AND column_name IN ('book_ids', 'books_titles')
+    """))
+    return result.scalar() > 0
+
+
+async def migrate_issue_items(session: AsyncSession, skip_missing: bool = False) -> int:
+    """Backfill issue_items from the array columns, then drop them.
+
+    Issued book ids that are missing from ``books`` are printed and, unless
+    ``skip_missing`` is set, abort the migration with :class:`MissingBooksError`
+    before anything is changed. Returns the number of items inserted.
+    """
+    await session.execute(CREATE_ISSUE_ITEMS)
+    await session.execute(text("CREATE INDEX IF NOT EXISTS ix_issue_items_issue_id ON issue_items (issue_id)"))
+    await session.execute(text("CREATE INDEX IF NOT EXISTS ix_issue_items_book_id ON issue_items (book_id)"))
+    await session.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_issue_items_active_book_id ON issue_items (book_id, issue_id) "
+        "WHERE returned_at IS NULL"
+    ))
+
+    inserted = 0
+    if await _has_array_columns(session):
+        missing = (await session.execute(FIND_MISSING_BOOKS)).all()
+        for issue_id, book_id in missing:
+            print(f"Issue {issue_id} references missing book {book_id}")
+        if missing and not skip_missing:
+            await session.rollback()
+            raise MissingBooksError(missing)
+        result = await session.execute(BACKFILL_ISSUE_ITEMS)
+        inserted = result.rowcount
+        await session.execute(text("ALTER TABLE issues DROP COLUMN IF EXISTS book_ids"))
+        await session.execute(text("ALTER TABLE issues DROP COLUMN IF EXISTS books_titles"))
+
+    await session.commit()
+    return inserted
+
+
+async def main(skip_missing: bool):
+    async with AsyncSessionLocal() as session:
+        inserted = await migrate_issue_items(session, skip_missing)
+    print(f"Migrated {inserted} issue items")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(skip_missing="--skip-missing" in sys.argv[1:]))
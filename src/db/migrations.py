@@ -0,0 +1,111 @@
+"""Alembic helpers used at application startup.
+
+    python -m src.db.migrations adopt   # put a schema created without Alembic under version control
+"""
+import asyncio
+import sys
+from pathlib import Path
+from sqlalchemy import text
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+# Revision whose tables init_db (and dev mode) also creates
+BASELINE_REVISION = "0001"
+BASELINE_TABLES = ("books", "students", "issues", "issue_items", "notifications")
+
+
+class SchemaVersionError(RuntimeError):
+    pass
+
+
+def alembic_config() -> Config:
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(ALEMBIC_INI.parent / "alembic"))
+    return config
+
+
+def head_revision() -> str:
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+
+async def current_revision(engine: AsyncEngine):
+    async with engine.connect() as conn:
+        return await conn.run_sync(
+            lambda sync_conn: MigrationContext.configure(sync_conn).get_current_revision()
+        )
+
+
+async def check_schema_version(engine: AsyncEngine) -> str:
+    """Fail fast unless the database is at the latest migration."""
+    current, head = await current_revision(engine), head_revision()
+    if current is None:
+        raise SchemaVersionError(
+            f"Database is not under Alembic, expected revision {head}. Run `alembic upgrade head` on an "
+            f"empty database, or `python -m src.db.migrations adopt` if the tables already exist."
+        )
+    if current != head:
+        raise SchemaVersionError(
+            f"Database schema is at revision {current}, expected {head}. Run `alembic upgrade head`."
+        )
+    return current
+
+
+async def upgrade_to_head(engine: AsyncEngine) -> str:
+    def upgrade(sync_conn):
+        config = alembic_config()
+        config.attributes["connection"] = sync_conn
+        command.upgrade(config, "head")
+
+    async with engine.begin() as conn:
+        await conn.run_sync(upgrade)
+    return head_revision()
+
+
+async def adopt_existing_schema(engine: AsyncEngine) -> str:
+    """Stamp an unversioned database at the baseline, then upgrade it to head.
+
+    0001 creates its tables unconditionally, so a database built by ``dev``
+    mode or ``init_db`` cannot simply be upgraded. Its tables are assumed to
+    match the baseline; only their presence is checked.
+    """
+    if await current_revision(engine) is not None:
+        return await upgrade_to_head(engine)
+
+    async with engine.connect() as conn:
+        result = await conn.execute(
+            text("SELECT table_name FROM information_schema.tables WHERE table_schema = current_schema()")
+        )
+        existing = set(result.scalars())
+    missing = [table for table in BASELINE_TABLES if table not in existing]
+    if missing:
+        raise SchemaVersionError(
+            f"Cannot adopt this database, tables are missing: {', '.join(missing)}. "
+            f"Run `python -m src.db.migrate_issue_items` first if it predates issue_items."
+        )
+
+    def stamp(sync_conn):
+        config = alembic_config()
+        config.attributes["connection"] = sync_conn
+        command.stamp(config, BASELINE_REVISION)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(stamp)
+    return await upgrade_to_head(engine)
+
+
+async def main(action: str):
+    from .session import engine
+    if action != "adopt":
+        raise SystemExit("usage: python -m src.db.migrations adopt")
+    revision = await adopt_existing_schema(engine)
+    print(f"Database adopted and migrated to revision {revision}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else ""))
@@ -0,0 +1,186 @@
+"""Slow-query log and per-statement totals.
+
+Statements are timed by the cursor hooks shared with the request metrics
+(``query_timing``). Those over SLOW_QUERY_MS are logged as one JSON line
+each, and a sample of slow SELECTs is re-run under
+``EXPLAIN (ANALYZE, BUFFERS)`` inside a savepoint that is rolled back.
+Totals are kept per normalized statement (literals and bind parameters
+replaced by ``?``) and can be read at ``GET /debug/queries``.
+"""
+import heapq
+import json
+import logging
+import random
+import re
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Optional
+from ..config import get_settings
+from .query_timing import add_query_listener, install_query_timing
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+EXPLAIN_SAVEPOINT = "query_profiler_explain"
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w$.])-?\d+(?:\.\d+)?\b")
+_BIND_PARAMETER = re.compile(r"\$\d+|%\(\w+\)s|%s")
+_VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_REPEATED_VALUES = re.compile(r"(\(\?\.\.\.\))(?:\s*,\s*\(\?\.\.\.\))+")
+
+
+@lru_cache(maxsize=2048)
+def normalize_sql(statement: str) -> str:
+    """Reduce a statement to its shape so executions with different values group together."""
+    sql = _WHITESPACE.sub(" ", statement).strip()
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _BIND_PARAMETER.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    # IN lists and multi-row VALUES vary in length; collapse them
+    sql = _VALUE_LIST.sub("(?...)", sql)
+    return _REPEATED_VALUES.sub(r"\1, ...", sql)
+
+
+def _truncate(value, limit: int = 500) -> str:
+    text = repr(value)
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+def _is_explainable(statement: str) -> bool:
+    # Re-running locking reads could hold row locks past the savepoint
+    sql = statement.lstrip().upper()
+    return sql.startswith(("SELECT", "WITH")) and " FOR UPDATE" not in sql and " FOR SHARE" not in sql
+
+
+@dataclass
+class QueryStats:
+    sql: str
+    calls: int = 0
+    total_time: float = 0.0
+    max_time: float = 0.0
+    rows: int = 0
+    slow_calls: int = 0
+    last_seen: Optional[datetime] = None
+    last_plan: Optional[str] = None
+
+    def as_dict(self) -> dict:
+        return {
+            "sql": self.sql,
+            "calls": self.calls,
+            "total_ms": round(self.total_time * 1000, 3),
+            "mean_ms": round(self.total_time / self.calls * 1000, 3) if self.calls else 0.0,
+            "max_ms": round(self.max_time * 1000, 3),
+            "rows": self.rows,
+            "slow_calls": self.slow_calls,
+            "last_seen": self.last_seen,
+            "last_plan": self.last_plan,
+        }
+
+
+class QueryProfiler:
+    """Per-process statement totals, capped at ``max_entries`` statements."""
+
+    def __init__(self, max_entries: int = 500, recent_slow: int = 100):
+        self.max_entries = max_entries
+        self.entries = {}
+        self.recent_slow = deque(maxlen=recent_slow)
+        self.started_at = datetime.now(timezone.utc)
+
+    def record(self, statement: str, elapsed: float, rows: int) -> QueryStats:
+        sql = normalize_sql(statement)
+        stats = self.entries.get(sql)
+        if stats is None:
+            if len(self.entries) >= self.max_entries:
+                self._evict()
+            stats = self.entries[sql] = QueryStats(sql)
+        stats.calls += 1
+        stats.total_time += elapsed
+        stats.max_time = max(stats.max_time, elapsed)
+        stats.rows += max(rows, 0)
+        stats.last_seen = datetime.now(timezone.utc)
+        return stats
+
+    def _evict(self):
+        # Forget the cheapest tenth in one pass, so the scan is paid once
+        # per many new statements rather than on every one
+        count = max(1, self.max_entries // 10)
+        for entry in heapq.nsmallest(count, self.entries.values(), key=lambda entry: entry.total_time):
+            del self.entries[entry.sql]
+
+    def top(self, limit: int, order: str = "total") -> list:
+        keys = {
+            "total": lambda entry: entry.total_time,
+            "mean": lambda entry: entry.total_time / entry.calls,
+            "max": lambda entry: entry.max_time,
+            "calls": lambda entry: entry.calls,
+        }
+        return [entry.as_dict() for entry in heapq.nlargest(limit, self.entries.values(), key=keys[order])]
+
+    def reset(self):
+        self.entries.clear()
+        self.recent_slow.clear()
+        self.started_at = datetime.now(timezone.utc)
+
+
+profiler = QueryProfiler(settings.QUERY_PROFILE_MAX_ENTRIES)
+
+
+def explain(conn, statement: str, parameters) -> Optional[str]:
+    """Run ``EXPLAIN (ANALYZE, BUFFERS)`` for a statement in its transaction.
+
+    ANALYZE executes the statement again, so it runs inside a savepoint
+    that is always rolled back.
+    """
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(f"SAVEPOINT {EXPLAIN_SAVEPOINT}")
+        try:
+            cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters)
+            return "\n".join(row[0] for row in cursor.fetchall())
+        finally:
+            cursor.execute(f"ROLLBACK TO SAVEPOINT {EXPLAIN_SAVEPOINT}")
+            cursor.execute(f"RELEASE SAVEPOINT {EXPLAIN_SAVEPOINT}")
+    except Exception as e:
+        logger.info(f"Could not capture plan for slow query: {str(e)}")
+        return None
+    finally:
+        cursor.close()
+
+
+def profile_query(conn, cursor, statement, parameters, executemany, elapsed):
+    stats = profiler.record(statement, elapsed, cursor.rowcount)
+
+    if elapsed * 1000 < settings.SLOW_QUERY_MS:
+        return
+    stats.slow_calls += 1
+    entry = {
+        "event": "slow_query",
+        "duration_ms": round(elapsed * 1000, 3),
+        "sql": stats.sql,
+        "params": _truncate(parameters),
+        "rows": cursor.rowcount,
+        "at": stats.last_seen.isoformat(),
+    }
+    if (
+        not executemany
+        and settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE > 0
+        and _is_explainable(statement)
+        and random.random() < settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE
+    ):
+        plan = explain(conn, statement, parameters)
+        if plan is not None:
+            stats.last_plan = plan
+            entry["plan"] = plan
+    profiler.recent_slow.append(entry)
+    logger.warning(json.dumps(entry, default=str))
+
+
+def install_query_profiler(engine):
+    """Time every statement on ``engine`` (an AsyncEngine or Engine)."""
+    install_query_timing(engine)
+    add_query_listener(profile_query)
@@ -0,0 +1,44 @@
+"""One pair of cursor events that times every statement for all consumers.
+
+Request metrics and the query profiler both need per-statement timings;
+rather than each registering its own before/after hooks, they register a
+listener here and receive the elapsed time measured once.
+"""
+import logging
+import time
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# Called as listener(conn, cursor, statement, parameters, executemany, elapsed)
+_listeners = []
+
+
+def add_query_listener(listener):
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is None or not hasattr(context, "_query_started"):
+        return
+    elapsed = time.perf_counter() - context._query_started
+    for listener in _listeners:
+        try:
+            listener(conn, cursor, statement, parameters, executemany, elapsed)
+        except Exception as e:
+            # Instrumentation must never fail the query it observed
+            logger.error(f"Query listener {listener.__name__} failed: {str(e)}")
+
+
+def install_query_timing(engine):
+    """Time every statement on ``engine`` (an AsyncEngine or Engine); safe to call twice."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if not event.contains(sync_engine, "after_cursor_execute", _after_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
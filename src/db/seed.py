@@ -0,0 +1,24 @@
+"""Load the sample students and books.
+
+    python -m src.db.seed           # add sample rows if the tables are empty
+    python -m src.db.seed --reset   # drop and recreate every table first (destroys data)
+"""
+import argparse
+import asyncio
+from .init_db import init_db, add_initial_data
+from .session import AsyncSessionLocal, engine
+
+
+async def seed(reset: bool = False):
+    if reset:
+        await init_db()
+    else:
+        async with AsyncSessionLocal() as session:
+            await add_initial_data(session)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load sample library data")
+    parser.add_argument("--reset", action="store_true", help="drop and recreate all tables before seeding")
+    asyncio.run(seed(parser.parse_args().reset))
@@ -1,14 +1,69 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from ..config import get_settings
 from typing import AsyncGenerator
+import time
 
 settings = get_settings()
 
+
+class PoolMetrics:
+    """Counters for connection checkouts from the engine pool."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.waiting = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record_wait(self, seconds: float):
+        self.checkouts += 1
+        self.total_wait += seconds
+        if seconds > self.max_wait:
+            self.max_wait = seconds
+
+
+pool_metrics = PoolMetrics()
+
+
+class MeteredAsyncQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long callers wait for a connection."""
+
+    def _do_get(self):
+        pool_metrics.waiting += 1
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_metrics.timeouts += 1
+            raise
+        finally:
+            pool_metrics.waiting -= 1
+        pool_metrics.record_wait(time.perf_counter() - start)
+        return connection
+
+
+def _engine_options() -> dict:
+    options = settings.pool_options()
+    statement_cache_size = options.pop("statement_cache_size")
+    connect_args = {}
+    if "asyncpg" in settings.DATABASE_URL:
+        connect_args = {
+            "statement_cache_size": statement_cache_size,
+            "prepared_statement_cache_size": statement_cache_size,
+        }
+    return {**options, "connect_args": connect_args}
+
+
 engine = create_async_engine(
     settings.DATABASE_URL,
-    echo=True,
-    future=True
+    echo=settings.DB_ECHO,
+    future=True,
+    poolclass=MeteredAsyncQueuePool,
+    **_engine_options()
 )
 
 AsyncSessionLocal = sessionmaker(
@@ -26,4 +81,20 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
         try:
             yield session
         finally:
-            await session.close() 
\ No newline at end of file
+            await session.close()
+
+def get_pool_stats() -> dict:
+    pool = engine.pool
+    checkouts = pool_metrics.checkouts
+    return {
+        "profile": settings.DB_POOL_PROFILE,
+        "pool_size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "waiting": pool_metrics.waiting,
+        "checkouts": checkouts,
+        "timeouts": pool_metrics.timeouts,
+        "avg_wait_ms": round(pool_metrics.total_wait / checkouts * 1000, 3) if checkouts else 0.0,
+        "max_wait_ms": round(pool_metrics.max_wait * 1000, 3),
+    }
@@ -0,0 +1,85 @@
+"""Materialized views behind the dashboard statistics.
+
+The views are refreshed in the background (see ``refresh_stats``), so
+reading them costs a few index lookups no matter how large the tables get.
+"""
+import time
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from .session import AsyncSessionLocal
+
+STATS_VIEWS = {
+    "stats_books_by_category": """
+        SELECT category,
+               count(*) AS titles,
+               coalesce(sum(copies), 0) AS total_copies,
+               coalesce(sum(available_copies), 0) AS available_copies
+        FROM books
+        GROUP BY category
+    """,
+    "stats_students_by_department": """
+        SELECT department, count(*) AS students
+        FROM students
+        GROUP BY department
+    """,
+    "stats_circulation": """
+        SELECT 1 AS id,
+               (SELECT count(*) FROM issues WHERE actual_return_date IS NULL) AS active_issues,
+               (SELECT count(*) FROM issue_items WHERE returned_at IS NULL) AS books_out,
+               (SELECT count(*) FROM issues
+                WHERE actual_return_date IS NULL
+                  AND return_date < (now() AT TIME ZONE 'utc')) AS overdue_issues,
+               (now() AT TIME ZONE 'utc') AS refreshed_at
+    """,
+}
+
+# REFRESH ... CONCURRENTLY needs a unique index on every view
+STATS_VIEW_KEYS = {
+    "stats_books_by_category": "category",
+    "stats_students_by_department": "department",
+    "stats_circulation": "id",
+}
+
+# Row count estimates kept up to date by the statistics collector, with the
+# planner's reltuples as a fallback; neither touches the tables themselves
+TABLE_ROW_ESTIMATES = text("""
+    SELECT c.relname AS table_name,
+           CAST(greatest(coalesce(s.n_live_tup, 0), c.reltuples, 0) AS BIGINT) AS row_count
+    FROM pg_class AS c
+    JOIN pg_namespace AS n ON n.oid = c.relnamespace
+    LEFT JOIN pg_stat_user_tables AS s ON s.relid = c.oid
+    WHERE n.nspname = 'public' AND c.relkind IN ('r', 'p')
+    ORDER BY c.relname
+""")
+
+
+async def create_stats_views(session: AsyncSession):
+    for name, query in STATS_VIEWS.items():
+        await session.execute(text(f"CREATE MATERIALIZED VIEW IF NOT EXISTS {name} AS {query}"))
+        await session.execute(text(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS uq_{name} ON {name} ({STATS_VIEW_KEYS[name]})"
+        ))
+
+
+async def drop_stats_views(session: AsyncSession):
+    for name in STATS_VIEWS:
+        await session.execute(text(f"DROP MATERIALIZED VIEW IF EXISTS {name}"))
+
+
+async def refresh_stats() -> float:
+    """Refresh every stats view without blocking readers; returns seconds taken."""
+    started = time.perf_counter()
+    async with AsyncSessionLocal() as session:
+        for name in STATS_VIEWS:
+            await session.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {name}"))
+            await session.commit()
+    return time.perf_counter() - started
+
+
+async def table_row_counts(session: AsyncSession, exact: bool = False) -> dict:
+    result = await session.execute(TABLE_ROW_ESTIMATES)
+    counts = dict(result.all())
+    if exact:
+        for table in counts:
+            counts[table] = await session.scalar(text(f'SELECT count(*) FROM "{table}"'))
+    return counts
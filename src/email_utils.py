@@ -1,21 +1,132 @@
+import asyncio
+import logging
 import smtplib
+from concurrent.futures import ThreadPoolExecutor
 from email.message import EmailMessage
+from typing import List, Optional
+from .config import get_settings
 
-def send_email(to_email, subject, body):
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Errors after which a connection is dropped and the message retried once
+RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError, TimeoutError)
+# The server refused this message; the session itself is still usable
+MESSAGE_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError)
+
+class MailNotConfigured(RuntimeError):
+    pass
+
+def mail_configured() -> bool:
+    """Whether a sender and SMTP credentials are set (or anonymous relay is allowed)."""
+    if not settings.SMTP_FROM:
+        return False
+    if settings.SMTP_ALLOW_ANONYMOUS:
+        return True
+    return bool(settings.SMTP_USERNAME and settings.SMTP_PASSWORD)
+
+def build_message(to_email, subject, body) -> EmailMessage:
     msg = EmailMessage()
-    msg["From"] = "your_gmail@gmail.com"      # <-- Your Gmail address
+    msg["From"] = settings.SMTP_FROM
     msg["To"] = to_email
     msg["Subject"] = subject
     msg.set_content(body)
+    return msg
 
-    # Gmail SMTP server setup
-    smtp_server = "smtp.gmail.com"
-    smtp_port = 587
-    username = "dasp43571@gmail.com"         # <-- Your Gmail address
-    password = "aefn iyvk bimq egff"            # <-- Your Gmail App Password
+def open_connection() -> smtplib.SMTP:
+    if not mail_configured():
+        raise MailNotConfigured("SMTP_FROM and SMTP_USERNAME/SMTP_PASSWORD must be set to send mail")
+    server = smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT, timeout=settings.SMTP_TIMEOUT)
+    try:
+        if settings.SMTP_USE_TLS:
+            server.starttls()
+        if settings.SMTP_USERNAME:
+            server.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD)
+    except Exception:
+        server.close()
+        raise
+    return server
 
-    with smtplib.SMTP(smtp_server, smtp_port) as server:
-        server.starttls()
-        server.login(username, password)
-        server.send_message(msg)
+def send_email(to_email, subject, body):
+    """Send one message over its own connection. Prefer :func:`send_email_async`
+    for anything that sends more than a handful of messages."""
+    with open_connection() as server:
+        server.send_message(build_message(to_email, subject, body))
         print("Email sent successfully!")
+
+
+class _PooledConnection:
+    def __init__(self, server: smtplib.SMTP):
+        self.server = server
+        self.sent = 0
+
+
+class SMTPConnectionPool:
+    """A small pool of authenticated SMTP sessions shared by async callers.
+
+    Each session is reused for up to ``max_messages`` messages. smtplib is
+    blocking, so all socket work runs on a dedicated thread pool.
+    """
+
+    def __init__(self, size: int, max_messages: int):
+        self.size = size
+        self.max_messages = max_messages
+        self._idle: List[_PooledConnection] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="smtp")
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def _acquire(self) -> _PooledConnection:
+        if self._idle:
+            return self._idle.pop()
+        return _PooledConnection(await self._run(open_connection))
+
+    async def _discard(self, connection: _PooledConnection):
+        try:
+            await self._run(connection.server.quit)
+        except Exception:
+            connection.server.close()
+
+    async def send(self, msg: EmailMessage):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.size)
+        async with self._slots:
+            connection = await self._acquire()
+            try:
+                await self._run(connection.server.send_message, msg)
+            except MESSAGE_ERRORS:
+                self._idle.append(connection)
+                raise
+            except RECONNECT_ERRORS as e:
+                # Server dropped an idle session; retry once on a fresh one
+                logger.warning(f"SMTP connection lost ({e}), reconnecting")
+                connection.server.close()
+                connection = _PooledConnection(await self._run(open_connection))
+                try:
+                    await self._run(connection.server.send_message, msg)
+                except Exception:
+                    await self._discard(connection)
+                    raise
+            except Exception:
+                await self._discard(connection)
+                raise
+            connection.sent += 1
+            if connection.sent >= self.max_messages:
+                await self._discard(connection)
+            else:
+                self._idle.append(connection)
+
+    async def close(self):
+        while self._idle:
+            await self._discard(self._idle.pop())
+
+
+mail_pool = SMTPConnectionPool(
+    size=settings.SMTP_POOL_SIZE,
+    max_messages=settings.SMTP_MAX_MESSAGES_PER_CONNECTION
+)
+
+async def send_email_async(to_email, subject, body):
+    await mail_pool.send(build_message(to_email, subject, body))
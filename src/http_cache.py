@@ -0,0 +1,85 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional, Tuple
+from fastapi import Request, Response
+
+# Clients may keep a copy but must revalidate it on every use
+CACHE_CONTROL = "no-cache"
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is None:
+        return None
+    # Naive timestamps in this schema are UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def weak_etag(*parts) -> str:
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def row_validators(kind: str, row_id: int, updated_at: Optional[datetime]) -> Tuple[str, Optional[datetime]]:
+    """ETag and Last-Modified for a single row."""
+    updated_at = _as_utc(updated_at)
+    return weak_etag(kind, row_id, updated_at.isoformat() if updated_at else ""), updated_at
+
+
+def page_etag(kind: str, params, rows, next_cursor: Optional[str] = None, prev_cursor: Optional[str] = None) -> str:
+    """Weak ETag for one page of a list, from the id and updated_at of each row.
+
+    The tag describes exactly what the page contains, so an insert, update or
+    delete that changes the page changes it, and no extra query is needed.
+    The cursors are part of it too: rows added past the end of the page
+    open a next page without changing the page itself.
+    Lists send no Last-Modified: the newest updated_at cannot see deletes.
+    """
+    versions = [next_cursor or "", prev_cursor or ""]
+    for row in rows:
+        updated_at = _as_utc(row.updated_at)
+        versions.append(f"{row.id}:{updated_at.isoformat() if updated_at else ''}")
+    return weak_etag(kind, params, *versions)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # Weak comparison: W/ prefixes are ignored
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in header.split(","))
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match takes precedence over If-Modified-Since (RFC 9110)
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return last_modified.replace(microsecond=0) <= _as_utc(since)
+    return False
+
+
+def set_validators(response: Response, etag: str, last_modified: Optional[datetime]):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    if last_modified is not None:
+        response.headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+
+
+def not_modified(etag: str, last_modified: Optional[datetime]) -> Response:
+    response = Response(status_code=304)
+    set_validators(response, etag, last_modified)
+    return response
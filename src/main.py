@@ -1,34 +1,52 @@
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from src.db.session import engine, Base, AsyncSessionLocal
-from src.db.init_db import init_db
-from sqlalchemy import text
-from src.routers import books, students, issues
+from src.db.session import engine, AsyncSessionLocal, get_pool_stats
+from src.db.init_db import create_schema
+from src.db.migrations import upgrade_to_head, check_schema_version
+from src.config import get_settings
+from src.routers import books, students, issues, exports, stats, debug
 from src.scheduler import start_scheduler
+from src.email_utils import mail_pool
+from src.cache import get_cache_stats
+from src.db.stats import table_row_counts
+from src.db.profiler import install_query_profiler
+from src.pagination import NEXT_CURSOR_HEADER, PREV_CURSOR_HEADER
+from src.metrics import MetricsMiddleware, install_query_hooks, render_metrics, PROMETHEUS_CONTENT_TYPE
+import time
 import traceback
 
+settings = get_settings()
+
+async def prepare_database():
+    if settings.DB_STARTUP_MODE == "dev":
+        # Sample data is loaded separately with `python -m src.db.seed`
+        print("Creating missing database tables...")
+        await create_schema()
+        print("Tables created successfully")
+    elif settings.DB_STARTUP_MODE == "migrate":
+        revision = await upgrade_to_head(engine)
+        print(f"Database migrated to revision {revision}")
+    else:
+        revision = await check_schema_version(engine)
+        print(f"Database schema is at revision {revision}")
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     try:
-        print("Starting application...")
-        # Create tables
-        print("Creating database tables...")
-        async with engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
-        print("Tables created successfully")
-        
-        # Initialize database with sample data
-        print("Initializing database with sample data...")
-        await init_db()
-        print("Database initialization completed")
+        started = time.perf_counter()
+        print(f"Starting application (DB_STARTUP_MODE={settings.DB_STARTUP_MODE})...")
+        await prepare_database()
         
         # Start the scheduler for reminders
         print("Starting scheduler...")
         start_scheduler()
         print("Scheduler started successfully")
+        print(f"Startup completed in {(time.perf_counter() - started) * 1000:.0f} ms")
         
         yield
+
+        await mail_pool.close()
     except Exception as e:
         print("Error during application startup:")
         print(f"Error type: {type(e).__name__}")
@@ -51,12 +69,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allows all methods
     allow_headers=["*"],  # Allows all headers
+    expose_headers=[NEXT_CURSOR_HEADER, PREV_CURSOR_HEADER, "ETag"],
 )
 
+# Per-route latency and query counts, served at /metrics
+app.add_middleware(MetricsMiddleware)
+install_query_hooks(engine)
+install_query_profiler(engine)
+
 # Include routers
 app.include_router(books.router, prefix="/api/v1/books", tags=["books"])
 app.include_router(students.router, prefix="/api/v1/students", tags=["students"])
 app.include_router(issues.router, prefix="/api/v1/issues", tags=["issues"])
+app.include_router(exports.router, prefix="/api/v1/exports", tags=["exports"])
+app.include_router(stats.router, prefix="/api/v1/stats", tags=["stats"])
+app.include_router(debug.router, prefix="/debug", tags=["debug"])
 
 @app.get("/")
 async def root():
@@ -66,41 +93,25 @@ async def root():
         "redoc_url": "/redoc"
     }
 
+@app.get("/db/pool-stats")
+async def pool_stats():
+    return get_pool_stats()
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return get_cache_stats()
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(render_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
+
 @app.get("/check-tables")
-async def check_tables():
+async def check_tables(exact: bool = False):
+    # Estimated counts come from the catalog; exact=true runs COUNT(*) per table
     async with AsyncSessionLocal() as session:
-        # Get list of all tables
-        result = await session.execute(text("""
-            SELECT table_name 
-            FROM information_schema.tables 
-            WHERE table_schema = 'public'
-        """))
-        tables = [row[0] for row in result.fetchall()]
-        
-        # Get count of records in each table
-        table_counts = {}
-        for table in tables:
-            count_result = await session.execute(text(f"SELECT COUNT(*) FROM {table}"))
-            count = count_result.scalar()
-            table_counts[table] = count
-            
+        table_counts = await table_row_counts(session, exact)
         return {
-            "tables": tables,
-            "record_counts": table_counts
+            "tables": list(table_counts),
+            "record_counts": table_counts,
+            "exact": exact
         }
-
-@app.get("/debug/db-state")
-async def debug_db_state():
-    async with AsyncSessionLocal() as session:
-        # Get all students
-        result = await session.execute(text("SELECT * FROM students"))
-        students = result.fetchall()
-        
-        # Get all books
-        result = await session.execute(text("SELECT * FROM books"))
-        books = result.fetchall()
-        
-        return {
-            "students": [dict(student) for student in students],
-            "books": [dict(book) for book in books]
-        } 
\ No newline at end of file
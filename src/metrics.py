@@ -0,0 +1,205 @@
+"""Per-route request metrics in the Prometheus text format.
+
+``MetricsMiddleware`` times every request and, through SQLAlchemy cursor
+events, counts the queries, database time and rows each request causes.
+Totals are kept per process and labelled with the route template
+(``/api/v1/books/{book_id}``), never the raw path.
+"""
+import logging
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+from .config import get_settings
+from .db.query_timing import add_query_listener, install_query_timing
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@dataclass
+class RequestStats:
+    queries: int = 0
+    db_time: float = 0.0
+    rows: int = 0
+
+
+# Stats of the request being served, if any; background jobs leave it unset
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class RouteMetrics:
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries_per_request = Histogram(QUERY_COUNT_BUCKETS)
+        self.statuses = defaultdict(int)
+        self.queries = 0
+        self.db_time = 0.0
+        self.rows = 0
+        self.query_alarms = 0
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.routes = defaultdict(RouteMetrics)
+
+    def record(self, method: str, route: str, status: int, elapsed: float, stats: RequestStats):
+        metrics = self.routes[(method, route)]
+        metrics.latency.observe(elapsed)
+        metrics.queries_per_request.observe(stats.queries)
+        metrics.statuses[status] += 1
+        metrics.queries += stats.queries
+        metrics.db_time += stats.db_time
+        metrics.rows += stats.rows
+        threshold = settings.QUERY_COUNT_ALARM_THRESHOLD
+        if threshold and stats.queries > threshold:
+            metrics.query_alarms += 1
+            logger.warning(
+                f"{method} {route} ran {stats.queries} queries in one request "
+                f"(threshold {threshold}, {stats.db_time * 1000:.1f} ms in the database)"
+            )
+
+    def render(self) -> str:
+        lines = []
+
+        def header(name, kind, help_text):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def histogram(name, attr, labels_of):
+            for key, metrics in sorted(self.routes.items()):
+                hist = getattr(metrics, attr)
+                labels = labels_of(key)
+                cumulative = 0
+                for bound, count in zip(hist.buckets, hist.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {hist.count}')
+                lines.append(f"{name}_sum{{{labels}}} {hist.total}")
+                lines.append(f"{name}_count{{{labels}}} {hist.count}")
+
+        def counter(name, attr):
+            for key, metrics in sorted(self.routes.items()):
+                lines.append(f"{name}{{{route_labels(key)}}} {getattr(metrics, attr)}")
+
+        header("http_requests_total", "counter", "Requests served, by route and status.")
+        for key, metrics in sorted(self.routes.items()):
+            for status, count in sorted(metrics.statuses.items()):
+                lines.append(f'http_requests_total{{{route_labels(key)},status="{status}"}} {count}')
+
+        header("http_request_duration_seconds", "histogram", "Request latency.")
+        histogram("http_request_duration_seconds", "latency", route_labels)
+
+        header("db_queries_per_request", "histogram", "Database queries run by a single request.")
+        histogram("db_queries_per_request", "queries_per_request", route_labels)
+
+        header("db_queries_total", "counter", "Database queries run while serving the route.")
+        counter("db_queries_total", "queries")
+
+        header("db_query_duration_seconds_total", "counter", "Time spent in database queries.")
+        counter("db_query_duration_seconds_total", "db_time")
+
+        header("db_rows_total", "counter", "Rows returned or changed by database queries.")
+        counter("db_rows_total", "rows")
+
+        header("db_query_alarms_total", "counter", "Requests over QUERY_COUNT_ALARM_THRESHOLD queries.")
+        counter("db_query_alarms_total", "query_alarms")
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def route_labels(key) -> str:
+    method, route = key
+    return f'method="{_escape(method)}",route="{_escape(route)}"'
+
+
+registry = MetricsRegistry()
+
+
+def route_template(scope) -> str:
+    """Full path template of the route that served the request.
+
+    Newer FastAPI versions keep included routers nested, so the matched
+    route only knows its own path; the prefixed template is kept in the
+    FastAPI scope entry. Unmatched paths share one label so they cannot
+    blow up cardinality.
+    """
+    included = (scope.get("fastapi") or {}).get("effective_route_context")
+    if included is not None and getattr(included, "path", None):
+        return included.path
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """ASGI middleware that records latency and query counts per route."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request.reset(token)
+            registry.record(scope["method"], route_template(scope), status, time.perf_counter() - started, stats)
+
+
+def count_request_query(conn, cursor, statement, parameters, executemany, elapsed):
+    stats = current_request.get()
+    if stats is None:
+        return
+    stats.queries += 1
+    stats.db_time += elapsed
+    if cursor.rowcount and cursor.rowcount > 0:
+        stats.rows += cursor.rowcount
+
+
+def install_query_hooks(engine):
+    """Count queries on ``engine`` (an AsyncEngine or Engine) per request."""
+    install_query_timing(engine)
+    add_query_listener(count_request_query)
+
+
+def render_metrics() -> str:
+    return registry.render()
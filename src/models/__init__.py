@@ -1,3 +1,5 @@
 from .book import Book
 from .student import Student
-from .issue import Issue 
\ No newline at end of file
+from .issue import Issue
+from .issue_item import IssueItem
+from .notification import Notification
@@ -1,8 +1,26 @@
-from sqlalchemy import Column, String, Integer
+from sqlalchemy import Column, String, Integer, Index, Computed
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred
 from .base import BaseModel
 
+# Weighted full-text document for book search (title > author > category > description)
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(author, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(category, '')), 'C') || "
+    "setweight(to_tsvector('english', coalesce(book_description, '')), 'D')"
+)
+
 class Book(BaseModel):
     __tablename__ = "books"
+    __table_args__ = (
+        # Keyset pagination order for book listings
+        Index("ix_books_title_id", "title", "id"),
+        # Search: full-text ranking plus pg_trgm indexes for substring filters
+        Index("ix_books_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_books_title_trgm", "title", postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+        Index("ix_books_author_trgm", "author", postgresql_using="gin", postgresql_ops={"author": "gin_trgm_ops"}),
+    )
 
     title = Column(String, index=True)
     author = Column(String, index=True)
@@ -10,4 +28,5 @@ class Book(BaseModel):
     copies = Column(Integer)
     available_copies = Column(Integer)
     category = Column(String, index=True)
-    book_description = Column(String, nullable=True) 
\ No newline at end of file
+    book_description = Column(String, nullable=True)
+    search_vector = deferred(Column(TSVECTOR, Computed(SEARCH_VECTOR_SQL, persisted=True)))
\ No newline at end of file
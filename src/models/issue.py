@@ -1,18 +1,43 @@
-from sqlalchemy import Column, Integer, DateTime, String, Boolean, ForeignKey
-from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy import Column, Integer, DateTime, Boolean, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 from .base import BaseModel
+from .issue_item import IssueItem
 
 class Issue(BaseModel):
     __tablename__ = "issues"
+    __table_args__ = (
+        # Only open issues are indexed for due-date scans (overdue report,
+        # reminders), so the index tracks the active set, not the history
+        Index("ix_issues_open_return_date", "return_date", postgresql_where=text("actual_return_date IS NULL")),
+        Index("ix_issues_student_issue_date", "student_id", text("issue_date DESC")),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(Integer, ForeignKey("students.id"))
-    book_ids = Column(ARRAY(Integer), nullable=False)
-    books_titles = Column(String, nullable=False)
     issue_date = Column(DateTime)
     return_date = Column(DateTime)
     actual_return_date = Column(DateTime, nullable=True)
     is_overdue = Column(Boolean, default=False)
 
-    student = relationship("Student") 
\ No newline at end of file
+    student = relationship("Student")
+    items = relationship(
+        IssueItem,
+        back_populates="issue",
+        lazy="selectin",
+        order_by=IssueItem.id,
+        cascade="all, delete-orphan",
+        passive_deletes=True
+    )
+
+    @property
+    def active_items(self):
+        return [item for item in self.items if item.returned_at is None]
+
+    @property
+    def book_ids(self):
+        """IDs of the books still out on this issue."""
+        return [item.book_id for item in self.active_items]
+
+    @property
+    def books_titles(self):
+        return ", ".join(sorted(item.book_title for item in self.active_items))
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, text
+from sqlalchemy.orm import relationship
+from .base import BaseModel
+
+class IssueItem(BaseModel):
+    """One book on an issue; returning it sets ``returned_at`` on this row only."""
+    __tablename__ = "issue_items"
+    __table_args__ = (
+        # Books still out, for "who holds this book" lookups
+        Index("ix_issue_items_active_book_id", "book_id", "issue_id", postgresql_where=text("returned_at IS NULL")),
+    )
+
+    issue_id = Column(Integer, ForeignKey("issues.id", ondelete="CASCADE"), nullable=False, index=True)
+    book_id = Column(Integer, ForeignKey("books.id"), nullable=False, index=True)
+    book_title = Column(String, nullable=False)
+    returned_at = Column(DateTime, nullable=True)
+
+    issue = relationship("Issue", back_populates="items")
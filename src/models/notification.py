@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, Index, UniqueConstraint, text
+from .base import BaseModel
+
+class Notification(BaseModel):
+    """Outbox row for an email; the dispatcher delivers pending rows with retries."""
+    __tablename__ = "notifications"
+    __table_args__ = (
+        # At most one reminder of a kind per issue per day
+        UniqueConstraint("issue_id", "kind", "reminder_date", name="uq_notifications_issue_kind_date"),
+        Index("ix_notifications_pending", "next_attempt_at", postgresql_where=text("status = 'pending'")),
+    )
+
+    issue_id = Column(Integer, ForeignKey("issues.id", ondelete="CASCADE"), nullable=False)
+    kind = Column(String, nullable=False, default="due_reminder")
+    reminder_date = Column(Date, nullable=False)
+    to_email = Column(String, nullable=False)
+    subject = Column(String, nullable=False)
+    body = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="pending")  # pending, sent or failed
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False)
+    last_error = Column(String, nullable=True)
+    sent_at = Column(DateTime, nullable=True)
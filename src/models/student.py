@@ -1,12 +1,20 @@
-from sqlalchemy import Column, String, Integer
+from sqlalchemy import Column, String, Integer, Index, Computed
+from sqlalchemy.orm import deferred
 from .base import BaseModel
 
+# Combined lookup text for the front-desk search (name, roll number, phone)
+SEARCH_TEXT_SQL = "name || ' ' || roll_number || ' ' || phone"
+
 class Student(BaseModel):
     __tablename__ = "students"
+    __table_args__ = (
+        Index("ix_students_search_text_trgm", "search_text", postgresql_using="gin", postgresql_ops={"search_text": "gin_trgm_ops"}),
+    )
 
     name = Column(String, index=True)
     roll_number = Column(String, unique=True, index=True)
     department = Column(String, index=True)
     semester = Column(Integer)
     phone = Column(String, unique=True, index=True)
-    email = Column(String, unique=True, index=True) 
\ No newline at end of file
+    email = Column(String, unique=True, index=True)
+    search_text = deferred(Column(String, Computed(SEARCH_TEXT_SQL, persisted=True)))
\ No newline at end of file
@@ -0,0 +1,76 @@
+import base64
+import binascii
+import json
+from typing import Callable, List, Optional, Sequence, Tuple
+from fastapi import HTTPException, Response
+from sqlalchemy import tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+PREV_CURSOR_HEADER = "X-Prev-Cursor"
+
+
+def encode_cursor(key: Sequence, direction: str = "next") -> str:
+    payload = json.dumps({"k": list(key), "d": direction}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[list, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        key, direction = payload["k"], payload["d"]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(key, list) or direction not in ("next", "prev"):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return key, direction
+
+
+def apply_keyset(query, columns: Sequence, limit: int, cursor: Optional[str] = None):
+    """Order ``query`` by ``columns`` and start it after the cursor position.
+
+    One extra row is fetched so :func:`build_page` can tell whether another
+    page exists. Returns the query and whether it runs backwards.
+    """
+    backwards = False
+    if cursor:
+        key, direction = decode_cursor(cursor)
+        if len(key) != len(columns):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        backwards = direction == "prev"
+        position = tuple_(*columns)
+        query = query.where(position < tuple_(*key) if backwards else position > tuple_(*key))
+    order = [column.desc() if backwards else column.asc() for column in columns]
+    return query.order_by(*order).limit(limit + 1), backwards
+
+
+def build_page(
+    rows: List,
+    key: Callable[[object], Sequence],
+    limit: int,
+    backwards: bool = False,
+    has_previous: bool = False
+) -> Tuple[List, Optional[str], Optional[str]]:
+    """Trim the look-ahead row and return (rows, next_cursor, prev_cursor)."""
+    has_more = len(rows) > limit
+    rows = list(rows[:limit])
+    if backwards:
+        rows.reverse()
+    if not rows:
+        return rows, None, None
+
+    first, last = key(rows[0]), key(rows[-1])
+    if backwards:
+        next_cursor = encode_cursor(last, "next")
+        prev_cursor = encode_cursor(first, "prev") if has_more else None
+    else:
+        next_cursor = encode_cursor(last, "next") if has_more else None
+        prev_cursor = encode_cursor(first, "prev") if has_previous else None
+    return rows, next_cursor, prev_cursor
+
+
+def set_cursor_headers(response: Response, next_cursor: Optional[str], prev_cursor: Optional[str]):
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    if prev_cursor:
+        response.headers[PREV_CURSOR_HEADER] = prev_cursor
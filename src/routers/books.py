@@ -1,46 +1,164 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import List
+from sqlalchemy import select, func, or_, literal_column
+from typing import List, Literal, Optional
 from ..db.session import get_db
+from ..db.book_import import import_book_rows, iter_lines, iter_csv_rows, iter_ndjson_rows
 from ..models.book import Book
-from ..schemas.book import BookCreate, Book as BookSchema, BookFilter
+from ..cache import cache, book_key, book_list_key, invalidate_books, invalidate_all_books
+from ..pagination import apply_keyset, build_page, set_cursor_headers
+from ..serialization import fast_json, fast_json_enabled, fields_dict, fields_dicts
+from ..http_cache import (
+    page_etag, row_validators, is_not_modified, not_modified, set_validators, parse_timestamp
+)
+from ..schemas.book import BookCreate, Book as BookSchema, BookFilter, BookImportResult
 
 router = APIRouter()
 
+def search_books(query, q: str):
+    """Match ``q`` against the full-text vector or fuzzily against title and
+    author, best matches first."""
+    tsquery = func.websearch_to_tsquery(literal_column("'english'"), q)
+    rank = func.ts_rank_cd(Book.search_vector, tsquery) + func.greatest(
+        func.similarity(Book.title, q), func.similarity(Book.author, q)
+    )
+    return query.filter(
+        or_(
+            Book.search_vector.op("@@")(tsquery),
+            Book.title.op("%")(q),
+            Book.author.op("%")(q)
+        )
+    ).order_by(rank.desc(), Book.id)
+
 @router.post("/", response_model=BookSchema)
 async def create_book(book: BookCreate, db: AsyncSession = Depends(get_db)):
     db_book = Book(**book.dict(), available_copies=book.copies)
     db.add(db_book)
     await db.commit()
     await db.refresh(db_book)
+    await invalidate_books([db_book.id])
     return db_book
 
+@router.post("/import", response_model=BookImportResult)
+async def import_books(
+    request: Request,
+    format: Optional[Literal["csv", "ndjson"]] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """Bulk upsert books on isbn from a streamed CSV or NDJSON body."""
+    if format is None:
+        content_type = request.headers.get("content-type", "").split(";")[0].strip()
+        if content_type == "text/csv":
+            format = "csv"
+        elif content_type in ("application/x-ndjson", "application/jsonl"):
+            format = "ndjson"
+        else:
+            raise HTTPException(
+                status_code=415,
+                detail="Send text/csv or application/x-ndjson, or pass format=csv|ndjson"
+            )
+
+    lines = iter_lines(request.stream())
+    rows = iter_csv_rows(lines) if format == "csv" else iter_ndjson_rows(lines)
+    result = await import_book_rows(db, rows)
+    if result.inserted or result.updated:
+        await invalidate_all_books()
+    return result
+
 @router.get("/", response_model=List[BookSchema])
 async def list_books(
+    request: Request,
+    response: Response,
     filters: BookFilter = Depends(),
     db: AsyncSession = Depends(get_db)
 ):
+    if filters.q and filters.cursor:
+        # Relevance-ranked results page by offset; a cursor would be silently ignored
+        raise HTTPException(status_code=422, detail="cursor cannot be combined with q; page search results with page")
+    params = filters.model_dump()
+    cache_key = await book_list_key(params)
+    cached = await cache.get(cache_key)
+    if cached is None:
+        books, next_cursor, prev_cursor = await fetch_books(filters, db)
+        cached = {
+            "items": fields_dicts(books, BookSchema),
+            "next": next_cursor,
+            "prev": prev_cursor,
+            "etag": page_etag("books", sorted(params.items()), books, next_cursor, prev_cursor),
+        }
+        await cache.set(cache_key, cached)
+    if is_not_modified(request, cached["etag"], None):
+        unchanged = not_modified(cached["etag"], None)
+        set_cursor_headers(unchanged, cached["next"], cached["prev"])
+        return unchanged
+    set_cursor_headers(response, cached["next"], cached["prev"])
+    set_validators(response, cached["etag"], None)
+    if fast_json_enabled("books"):
+        return fast_json(cached["items"], response)
+    return cached["items"]
+
+def book_query(filters: BookFilter):
     query = select(Book)
-    
     if filters.title:
         query = query.filter(Book.title.ilike(f"%{filters.title}%"))
     if filters.author:
         query = query.filter(Book.author.ilike(f"%{filters.author}%"))
     if filters.category:
         query = query.filter(Book.category == filters.category)
+    if filters.q:
+        query = search_books(query, filters.q)
+    return query
+
+async def fetch_books(filters: BookFilter, db: AsyncSession):
+    """Run a book list query; returns (books, next_cursor, prev_cursor)."""
+    query = book_query(filters)
+
+    # Relevance-ordered search pages by offset; cursors follow the (title, id) order
+    if filters.q:
+        query = query.offset((filters.page - 1) * filters.limit).limit(filters.limit)
+        result = await db.execute(query)
+        return result.scalars().all(), None, None
     
-    query = query.offset((filters.page - 1) * filters.limit).limit(filters.limit)
+    # Keyset pagination on (title, id); page is only honoured without a cursor
+    sort_columns = (Book.title, Book.id)
+    query, backwards = apply_keyset(query, sort_columns, filters.limit, filters.cursor)
+    has_previous = bool(filters.cursor)
+    if not filters.cursor and filters.page > 1:
+        query = query.offset((filters.page - 1) * filters.limit)
+        has_previous = True
+
     result = await db.execute(query)
-    return result.scalars().all()
+    return build_page(
+        result.scalars().all(),
+        key=lambda book: (book.title, book.id),
+        limit=filters.limit,
+        backwards=backwards,
+        has_previous=has_previous
+    )
 
 @router.get("/{book_id}", response_model=BookSchema)
-async def get_book(book_id: int, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(Book).filter(Book.id == book_id))
-    book = result.scalar_one_or_none()
-    if not book:
-        raise HTTPException(status_code=404, detail="Book not found")
-    return book
+async def get_book(book_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+    cache_key = await book_key(book_id)
+    cached = await cache.get(cache_key)
+    if cached is None:
+        result = await db.execute(select(Book).filter(Book.id == book_id))
+        book = result.scalar_one_or_none()
+        if not book:
+            raise HTTPException(status_code=404, detail="Book not found")
+        cached = {
+            "book": fields_dict(book, BookSchema),
+            "updated_at": book.updated_at.isoformat() if book.updated_at else None,
+        }
+        await cache.set(cache_key, cached)
+
+    etag, last_modified = row_validators("book", book_id, parse_timestamp(cached["updated_at"]))
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+    set_validators(response, etag, last_modified)
+    if fast_json_enabled("books"):
+        return fast_json(cached["book"], response)
+    return cached["book"]
 
 @router.put("/{book_id}", response_model=BookSchema)
 async def update_book(
@@ -58,6 +176,7 @@ async def update_book(
     
     await db.commit()
     await db.refresh(book)
+    await invalidate_books([book_id])
     return book
 
 @router.delete("/{book_id}")
@@ -68,5 +187,11 @@ async def delete_book(book_id: int, db: AsyncSession = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Book not found")
     
     await db.delete(book)
-    await db.commit()
+    try:
+        await db.commit()
+    except IntegrityError:
+        # issue_items keep a reference to every book ever issued
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Book has circulation history and cannot be deleted")
+    await invalidate_books([book_id])
     return {"message": "Book deleted successfully"} 
\ No newline at end of file
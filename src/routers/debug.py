@@ -0,0 +1,118 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Literal
+from ..config import get_settings
+from ..db.session import get_db
+from ..db.stats import table_row_counts
+from ..db.diagnostics import (
+    DIAGNOSTIC_TABLES, bounded_rows, index_usage, max_rows, sample_rows, slow_statements,
+    table_bloat, table_columns, table_sizes
+)
+from ..db.profiler import profiler
+from ..pagination import apply_keyset, build_page, set_cursor_headers
+
+settings = get_settings()
+
+router = APIRouter()
+
+def diagnostic_model(table: str):
+    model = DIAGNOSTIC_TABLES.get(table)
+    if model is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Unknown table '{table}', expected one of: {', '.join(DIAGNOSTIC_TABLES)}"
+        )
+    return model
+
+@router.get("/db-state")
+async def db_state(
+    sample: int = Query(5, ge=0, le=settings.DEBUG_MAX_ROWS),
+    db: AsyncSession = Depends(get_db)
+):
+    """Estimated size of each table plus a small random sample of its rows."""
+    counts = await table_row_counts(db)
+    tables = {}
+    for name, model in DIAGNOSTIC_TABLES.items():
+        estimated_rows = counts.get(name, 0)
+        tables[name] = {
+            "estimated_rows": estimated_rows,
+            "sample": await sample_rows(db, model, sample, estimated_rows) if sample else [],
+        }
+    return {"tables": tables}
+
+@router.get("/tables")
+async def list_table_sizes(db: AsyncSession = Depends(get_db)):
+    return await table_sizes(db)
+
+@router.get("/tables/{table}/rows")
+async def table_rows(
+    table: str,
+    response: Response,
+    limit: int = Query(20, ge=1, le=settings.DEBUG_MAX_ROWS),
+    cursor: str = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """Page through a table in id order; follow X-Next-Cursor for more."""
+    model = diagnostic_model(table)
+    query, backwards = apply_keyset(
+        select(*table_columns(model.__table__)), (model.id,), max_rows(limit), cursor
+    )
+    result = await db.execute(query)
+    rows, next_cursor, prev_cursor = build_page(
+        result.mappings().all(),
+        key=lambda row: (row["id"],),
+        limit=max_rows(limit),
+        backwards=backwards,
+        has_previous=bool(cursor)
+    )
+    set_cursor_headers(response, next_cursor, prev_cursor)
+    return bounded_rows(rows)
+
+@router.get("/tables/{table}/sample")
+async def table_sample(
+    table: str,
+    size: int = Query(10, ge=1, le=settings.DEBUG_MAX_ROWS),
+    db: AsyncSession = Depends(get_db)
+):
+    model = diagnostic_model(table)
+    counts = await table_row_counts(db)
+    return await sample_rows(db, model, size, counts.get(table, 0))
+
+@router.get("/indexes")
+async def list_index_usage(db: AsyncSession = Depends(get_db)):
+    return await index_usage(db)
+
+@router.get("/bloat")
+async def list_table_bloat(db: AsyncSession = Depends(get_db)):
+    return await table_bloat(db)
+
+@router.get("/statements")
+async def list_slow_statements(
+    limit: int = Query(20, ge=1, le=settings.DEBUG_MAX_ROWS),
+    order: Literal["total", "mean", "calls"] = "total",
+    db: AsyncSession = Depends(get_db)
+):
+    return await slow_statements(db, limit, order)
+
+@router.get("/queries")
+async def list_query_profile(
+    limit: int = Query(20, ge=1, le=settings.DEBUG_MAX_ROWS),
+    order: Literal["total", "mean", "max", "calls"] = "total"
+):
+    """Most expensive statements seen by this process, grouped by normalized SQL."""
+    return {
+        "since": profiler.started_at,
+        "tracked": len(profiler.entries),
+        "slow_query_ms": settings.SLOW_QUERY_MS,
+        "queries": profiler.top(limit, order),
+    }
+
+@router.get("/queries/slow")
+async def list_recent_slow_queries(limit: int = Query(20, ge=1, le=settings.DEBUG_MAX_ROWS)):
+    return list(profiler.recent_slow)[-limit:][::-1]
+
+@router.delete("/queries")
+async def reset_query_profile():
+    profiler.reset()
+    return {"message": "Query profile reset"}
@@ -0,0 +1,79 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy import select
+from ..models.book import Book
+from ..models.issue import Issue
+from ..models.issue_item import IssueItem
+from ..models.student import Student
+from ..schemas.book import Book as BookSchema
+from ..schemas.student import Student as StudentSchema
+from ..schemas.export import BookExportFilter, StudentExportFilter, IssueExportFilter
+from ..streaming import export_response, model_columns
+
+router = APIRouter()
+
+# One row per book on an issue, i.e. the full circulation history
+ISSUE_EXPORT_COLUMNS = [
+    IssueItem.id.label("item_id"),
+    Issue.id.label("issue_id"),
+    Issue.student_id,
+    Student.name.label("student_name"),
+    Student.roll_number,
+    Student.department,
+    IssueItem.book_id,
+    IssueItem.book_title,
+    Issue.issue_date,
+    Issue.return_date,
+    IssueItem.returned_at,
+]
+
+def _column_names(columns) -> list:
+    return [column.key for column in columns]
+
+@router.get("/books")
+async def export_books(filters: BookExportFilter = Depends()):
+    columns = model_columns(Book, BookSchema)
+    query = select(*columns)
+    if filters.category:
+        query = query.filter(Book.category == filters.category)
+    if filters.author:
+        query = query.filter(Book.author == filters.author)
+    return export_response(
+        query.order_by(Book.id), _column_names(columns), "books", filters.format, filters.gzip
+    )
+
+@router.get("/students")
+async def export_students(filters: StudentExportFilter = Depends()):
+    columns = model_columns(Student, StudentSchema)
+    query = select(*columns)
+    if filters.department:
+        query = query.filter(Student.department == filters.department)
+    if filters.semester:
+        query = query.filter(Student.semester == filters.semester)
+    return export_response(
+        query.order_by(Student.id), _column_names(columns), "students", filters.format, filters.gzip
+    )
+
+@router.get("/issues")
+async def export_issues(filters: IssueExportFilter = Depends()):
+    query = (
+        select(*ISSUE_EXPORT_COLUMNS)
+        .join(Issue, Issue.id == IssueItem.issue_id)
+        .join(Student, Student.id == Issue.student_id)
+    )
+    if filters.issued_from:
+        query = query.filter(Issue.issue_date >= filters.issued_from)
+    if filters.issued_to:
+        query = query.filter(Issue.issue_date < filters.issued_to)
+    if filters.department:
+        query = query.filter(Student.department == filters.department)
+    if filters.student_id:
+        query = query.filter(Issue.student_id == filters.student_id)
+    if filters.book_id:
+        query = query.filter(IssueItem.book_id == filters.book_id)
+    if filters.status == "out":
+        query = query.filter(IssueItem.returned_at == None)
+    elif filters.status == "returned":
+        query = query.filter(IssueItem.returned_at != None)
+    return export_response(
+        query.order_by(IssueItem.id), _column_names(ISSUE_EXPORT_COLUMNS), "issues", filters.format, filters.gzip
+    )
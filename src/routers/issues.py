@@ -1,17 +1,53 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from sqlalchemy import select, update, and_, any_, bindparam, cast, extract, literal, Integer
+from sqlalchemy.orm import contains_eager
+from sqlalchemy.dialects.postgresql import ARRAY
+from collections import Counter
 from datetime import datetime, timedelta, timezone
 from typing import List, Optional
 from ..db.session import get_db
+from ..db.inventory import reserve_copies, release_copies
+from ..cache import invalidate_books
+from ..serialization import fast_json, fast_json_enabled
 from ..models.issue import Issue
+from ..models.issue_item import IssueItem
 from ..models.book import Book
 from ..models.student import Student
-from ..schemas.issue import IssueCreate, Issue as IssueSchema, StudentIssue, AdminIssue
+from ..schemas.issue import IssueCreate, Issue as IssueSchema, StudentIssue, AdminIssue, OverdueFilter, BookHolder
 from src.scheduler import start_scheduler
 
 router = APIRouter()
 
+def student_history_query(student_id: int):
+    """All of a student's issues, newest first (served by ix_issues_student_issue_date)."""
+    return select(Issue).where(Issue.student_id == student_id).order_by(Issue.issue_date.desc())
+
+def overdue_query(now_naive: datetime, filters: OverdueFilter):
+    """One page of open issues past their return date (served by ix_issues_open_return_date)."""
+    days_overdue = cast(extract("day", literal(now_naive) - Issue.return_date), Integer).label("days_overdue")
+
+    # One joined query; the inner join also drops issues whose student is gone
+    query = (
+        select(Issue, days_overdue)
+        .join(Issue.student)
+        .options(contains_eager(Issue.student))
+        .where(
+            Issue.actual_return_date == None,
+            Issue.return_date < now_naive
+        )
+    )
+
+    descending = filters.order == "desc"
+    if filters.sort == "days_overdue":
+        # Most overdue first means earliest return date first
+        order_by = [Issue.return_date.asc() if descending else Issue.return_date.desc()]
+    else:
+        columns = [Student.name] if filters.sort == "student" else [Student.department, Student.name]
+        order_by = [column.desc() if descending else column.asc() for column in columns]
+    query = query.order_by(*order_by, Issue.id)
+    return query.offset((filters.page - 1) * filters.limit).limit(filters.limit)
+
 @router.post("/issue", response_model=IssueSchema, status_code=status.HTTP_201_CREATED)
 async def issue_book(issue_data: IssueCreate, db: AsyncSession = Depends(get_db)):
     # Check if student exists
@@ -36,54 +72,67 @@ async def issue_book(issue_data: IssueCreate, db: AsyncSession = Depends(get_db)
     start_of_day = issue_date_naive.replace(hour=0, minute=0, second=0, microsecond=0)
     end_of_day = start_of_day + timedelta(days=1, microseconds=-1)
 
+    # Locked so a concurrent return cannot close the issue while items are
+    # added; an issue closed meanwhile no longer matches and a new one is made.
+    # Issue before books, the same order return_book takes its locks in.
     existing_issue = await db.scalar(
         select(Issue).where(
             Issue.student_id == issue_data.student_id,
             Issue.issue_date >= start_of_day,
             Issue.issue_date <= end_of_day,
             Issue.actual_return_date == None # Only consider active issues
-        )
+        ).with_for_update()
+    )
+
+    # Lock the requested books in id order so concurrent checkouts of
+    # overlapping baskets cannot deadlock, then take the copies with one
+    # conditional UPDATE that never lets available_copies drop below zero.
+    requested = Counter(incoming_book_ids)
+    result = await db.execute(
+        select(Book.id, Book.title)
+        .where(Book.id == any_(bindparam("book_ids", sorted(requested), type_=ARRAY(Integer))))
+        .order_by(Book.id)
+        .with_for_update()
     )
+    titles_by_id = dict(result.all())
 
-    # Validate and prepare books
-    books_to_issue = []
-    book_titles = []
-    for book_id in incoming_book_ids:
-        book = await db.scalar(select(Book).where(Book.id == book_id))
-        if not book:
-            raise HTTPException(status_code=404, detail=f"Book with ID {book_id} not found")
-        if book.available_copies <= 0:
-            raise HTTPException(status_code=400, detail=f"Book with ID {book_id} not available")
-        books_to_issue.append(book)
-        book_titles.append(book.title)
+    missing = [book_id for book_id in sorted(requested) if book_id not in titles_by_id]
+    unavailable = await reserve_copies(
+        db, Counter({book_id: count for book_id, count in requested.items() if book_id in titles_by_id})
+    )
+    if missing or unavailable:
+        await db.rollback()
+        problems = []
+        if missing:
+            problems.append(f"Books with IDs {', '.join(map(str, missing))} not found")
+        if unavailable:
+            problems.append(f"Books with IDs {', '.join(map(str, unavailable))} not available")
+        raise HTTPException(status_code=404 if missing else 400, detail="; ".join(problems))
+
+    new_items = [
+        IssueItem(book_id=book_id, book_title=titles_by_id[book_id]) for book_id in incoming_book_ids
+    ]
 
     if existing_issue:
         # Update existing issue record
         print(f"Updating existing issue record for student {student.id} on {issue_date_naive.date()}")
-        existing_issue.book_ids.extend(incoming_book_ids)
-        existing_issue.books_titles = ", ".join(sorted(list(set(existing_issue.books_titles.split(', ') + book_titles))))
+        existing_issue.items.extend(new_items)
         existing_issue.updated_at = datetime.now().replace(tzinfo=None)
-        db.add(existing_issue)
         issued_record = existing_issue
     else:
         # Create new issue record
         print(f"Creating new issue record for student {student.id} on {issue_date_naive.date()}")
         issued_record = Issue(
             student_id=issue_data.student_id,
-            book_ids=incoming_book_ids,
-            books_titles=", ".join(sorted(book_titles)),
+            items=new_items,
             issue_date=issue_date_naive,
             return_date=return_date_naive,
             is_overdue=False
         )
         db.add(issued_record)
 
-    # Update book availability
-    for book in books_to_issue:
-        book.available_copies -= 1
-        db.add(book)
-
     await db.commit()
+    await invalidate_books(requested)
     await db.refresh(issued_record)
     
     # To ensure relationships are loaded for response_model, manually fetch details
@@ -96,44 +145,45 @@ async def issue_book(issue_data: IssueCreate, db: AsyncSession = Depends(get_db)
 
 @router.put("/{issue_id}/return/{book_id}", response_model=IssueSchema)
 async def return_book(issue_id: int, book_id: int, db: AsyncSession = Depends(get_db)):
-    issue = await db.scalar(select(Issue).where(Issue.id == issue_id))
+    # Returns on one issue take turns, so the last one always sees every
+    # other returned item and closes the issue
+    issue = await db.scalar(select(Issue).where(Issue.id == issue_id).with_for_update())
     if not issue:
         raise HTTPException(status_code=404, detail="Issue record not found")
 
-    if book_id not in issue.book_ids:
+    # Return one outstanding copy of the book: a single-row update, guarded
+    # on returned_at so two concurrent returns cannot both succeed
+    now_naive = datetime.now().replace(tzinfo=None)
+    outstanding = (
+        select(IssueItem.id)
+        .where(IssueItem.issue_id == issue_id, IssueItem.book_id == book_id, IssueItem.returned_at == None)
+        .order_by(IssueItem.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+    returned_item_id = await db.scalar(
+        update(IssueItem)
+        .where(IssueItem.id == outstanding, IssueItem.returned_at == None)
+        .values(returned_at=now_naive, updated_at=now_naive)
+        .returning(IssueItem.id)
+    )
+    if returned_item_id is None:
         raise HTTPException(status_code=400, detail=f"Book with ID {book_id} was not issued in this record.")
 
-    # Remove book from the issue record
-    issue.book_ids.remove(book_id)
-    
-    # Reconstruct books_titles
-    current_book_titles = issue.books_titles.split(', ')
-    book_to_remove_title = None
-    
-    # Fetch the actual book title from the database to ensure correctness
-    book_obj = await db.scalar(select(Book).where(Book.id == book_id))
-    if book_obj:
-        book_to_remove_title = book_obj.title
-
-    if book_to_remove_title and book_to_remove_title in current_book_titles:
-        current_book_titles.remove(book_to_remove_title)
-    issue.books_titles = ", ".join(sorted(current_book_titles))
-
     # Update actual_return_date only if all books are returned from this issue
-    if not issue.book_ids: # If no books left in the array
-        issue.actual_return_date = datetime.now().replace(tzinfo=None)
+    books_out = await db.scalar(
+        select(IssueItem.id).where(IssueItem.issue_id == issue_id, IssueItem.returned_at == None).limit(1)
+    )
+    if books_out is None:
+        issue.actual_return_date = now_naive
         issue.is_overdue = (issue.actual_return_date > issue.return_date)
-
-    issue.updated_at = datetime.now().replace(tzinfo=None)
-    db.add(issue)
+    issue.updated_at = now_naive
 
     # Update book availability
-    book = await db.scalar(select(Book).where(Book.id == book_id))
-    if book:
-        book.available_copies += 1
-        db.add(book)
+    await release_copies(db, Counter([book_id]))
 
     await db.commit()
+    await invalidate_books([book_id])
     await db.refresh(issue)
 
     # To ensure relationships are loaded for response_model, manually fetch details
@@ -147,11 +197,7 @@ async def get_student_issues(student_id: int, db: AsyncSession = Depends(get_db)
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
 
-    result = await db.execute(
-        select(Issue).where(
-            Issue.student_id == student_id
-        ).order_by(Issue.issue_date.desc())
-    )
+    result = await db.execute(student_history_query(student_id))
     issues = result.scalars().all()
 
     current_time_utc = datetime.now(timezone.utc)
@@ -164,59 +210,73 @@ async def get_student_issues(student_id: int, db: AsyncSession = Depends(get_db)
         days_left = (issue_return_date_aware - current_time_utc).days
         is_overdue = days_left < 0 and issue.actual_return_date is None
 
-        student_issue = StudentIssue(
-            id=issue.id,
-            student_id=issue.student_id,
-            book_ids=issue.book_ids,
-            books_titles=issue.books_titles,
-            issue_date=issue.issue_date,
-            return_date=issue.return_date,
-            actual_return_date=issue.actual_return_date,
-            is_overdue=is_overdue,
-            days_remaining=abs(days_left) if not is_overdue and issue.actual_return_date is None else None,
-            # Manual assignment of student object for the response model
-            student=student 
-        )
-        student_issues.append(student_issue)
-
+        student_issues.append({
+            "id": issue.id,
+            "student_id": issue.student_id,
+            "book_ids": issue.book_ids,
+            "books_titles": issue.books_titles,
+            "issue_date": issue.issue_date,
+            "return_date": issue.return_date,
+            "actual_return_date": issue.actual_return_date,
+            "is_overdue": is_overdue,
+            "days_remaining": abs(days_left) if not is_overdue and issue.actual_return_date is None else None,
+        })
+
+    # Rows are built as plain dicts so they are validated at most once
+    if fast_json_enabled("issues"):
+        return fast_json(student_issues)
     return student_issues
 
-@router.get("/overdue", response_model=List[AdminIssue])
-async def get_overdue_books(db: AsyncSession = Depends(get_db)):
-    current_time_utc = datetime.now(timezone.utc)
-    
+@router.get("/book/{book_id}/holders", response_model=List[BookHolder])
+async def get_book_holders(book_id: int, db: AsyncSession = Depends(get_db)):
+    """Students who currently hold a copy of the book, soonest due first."""
+    book = await db.scalar(select(Book.id).where(Book.id == book_id))
+    if not book:
+        raise HTTPException(status_code=404, detail="Book not found")
+
+    # Served from the partial index on unreturned items, so the cost depends
+    # on the copies out right now rather than the size of the issue history
     result = await db.execute(
-        select(Issue).where(
-            Issue.actual_return_date == None,
-            Issue.return_date < current_time_utc.replace(tzinfo=None) # Compare naive dates
-        )
+        select(Issue.id, Issue.issue_date, Issue.return_date, Student)
+        .join(IssueItem, IssueItem.issue_id == Issue.id)
+        .join(Student, Student.id == Issue.student_id)
+        .where(IssueItem.book_id == book_id, IssueItem.returned_at == None)
+        .distinct()
+        .order_by(Issue.return_date, Issue.id)
     )
-    issues = result.scalars().all()
 
-    overdue_issues = []
-    for issue in issues:
-        # Convert return_date to timezone-aware for calculation if it's naive
-        issue_return_date_aware = issue.return_date.replace(tzinfo=timezone.utc) if issue.return_date.tzinfo is None else issue.return_date
-        days_overdue = (current_time_utc - issue_return_date_aware).days
-
-        # Fetch student for the response model
-        student = await db.scalar(select(Student).where(Student.id == issue.student_id))
-        if not student: # Should not happen if data integrity is maintained
-            continue 
-
-        admin_issue = AdminIssue(
-            id=issue.id,
-            student_id=issue.student_id,
-            book_ids=issue.book_ids,
-            books_titles=issue.books_titles,
-            issue_date=issue.issue_date,
-            return_date=issue.return_date,
-            actual_return_date=issue.actual_return_date,
-            is_overdue=True,
-            days_overdue=days_overdue,
-            # Manual assignment of student object for the response model
-            student=student 
+    now_naive = datetime.now(timezone.utc).replace(tzinfo=None)
+    return [
+        BookHolder(
+            issue_id=issue_id,
+            student=student,
+            issue_date=issue_date,
+            return_date=return_date,
+            is_overdue=return_date < now_naive
         )
-        overdue_issues.append(admin_issue)
+        for issue_id, issue_date, return_date, student in result.all()
+    ]
 
-    return overdue_issues 
\ No newline at end of file
+@router.get("/overdue", response_model=List[AdminIssue])
+async def get_overdue_books(filters: OverdueFilter = Depends(), db: AsyncSession = Depends(get_db)):
+    now_naive = datetime.now(timezone.utc).replace(tzinfo=None) # Compare naive dates
+    query = overdue_query(now_naive, filters)
+
+    result = await db.execute(query)
+    overdue = [
+        {
+            "id": issue.id,
+            "student_id": issue.student_id,
+            "book_ids": issue.book_ids,
+            "books_titles": issue.books_titles,
+            "issue_date": issue.issue_date,
+            "return_date": issue.return_date,
+            "actual_return_date": issue.actual_return_date,
+            "is_overdue": True,
+            "days_overdue": days
+        }
+        for issue, days in result.all()
+    ]
+    if fast_json_enabled("issues"):
+        return fast_json(overdue)
+    return overdue
\ No newline at end of file
@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+from ..db.session import get_db
+from ..db.stats import refresh_stats, table_row_counts
+from ..schemas.stats import LibraryStats, TableCounts
+
+router = APIRouter()
+
+@router.get("/", response_model=LibraryStats)
+async def library_stats(db: AsyncSession = Depends(get_db)):
+    """Dashboard figures read from the stats views, which are at most
+    STATS_REFRESH_SECONDS old."""
+    categories = await db.execute(text(
+        "SELECT category, titles, total_copies, available_copies "
+        "FROM stats_books_by_category ORDER BY category"
+    ))
+    departments = await db.execute(text(
+        "SELECT department, students FROM stats_students_by_department ORDER BY department"
+    ))
+    circulation = await db.execute(text(
+        "SELECT active_issues, books_out, overdue_issues, refreshed_at FROM stats_circulation"
+    ))
+    totals = circulation.mappings().one_or_none() or {
+        "active_issues": 0, "books_out": 0, "overdue_issues": 0, "refreshed_at": None
+    }
+    return {
+        "books_by_category": categories.mappings().all(),
+        "students_by_department": departments.mappings().all(),
+        **totals,
+    }
+
+@router.post("/refresh", response_model=LibraryStats)
+async def refresh_library_stats(db: AsyncSession = Depends(get_db)):
+    await refresh_stats()
+    return await library_stats(db)
+
+@router.get("/tables", response_model=TableCounts)
+async def table_counts(exact: bool = False, db: AsyncSession = Depends(get_db)):
+    """Row counts per table; estimates unless ``exact`` is set, which scans every table."""
+    return {"exact": exact, "record_counts": await table_row_counts(db, exact)}
@@ -1,13 +1,41 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, or_
+from sqlalchemy import select, or_, func
 from typing import List
 from ..db.session import get_db
 from ..models.student import Student
 from ..schemas.student import StudentCreate, Student as StudentSchema, StudentFilter
+from ..pagination import apply_keyset, build_page, set_cursor_headers
+from ..streaming import NDJSON_MEDIA_TYPE, model_columns, stream_ndjson
+from ..serialization import fast_json, fast_json_enabled, fields_dicts
+from ..http_cache import page_etag, row_validators, is_not_modified, not_modified, set_validators
 
 router = APIRouter()
 
+def contains_pattern(term: str) -> str:
+    """ILIKE pattern matching ``term`` literally, so % and _ are not wildcards."""
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+def search_students(query, search: str):
+    """Trigram-indexed substring match on name, roll number and phone. An
+    exact roll number or phone sorts first, then the closest matches."""
+    exact = or_(Student.roll_number == search, Student.phone == search)
+    similarity = func.greatest(
+        func.similarity(Student.name, search),
+        func.similarity(Student.roll_number, search),
+        func.similarity(Student.phone, search)
+    )
+    return query.filter(Student.search_text.ilike(contains_pattern(search))).order_by(
+        exact.desc(), similarity.desc(), Student.id
+    )
+
+def student_list_response(students, response: Response):
+    if fast_json_enabled("students"):
+        return fast_json(fields_dicts(students, StudentSchema), response)
+    return students
+
 @router.post("/", response_model=StudentSchema)
 async def create_student(student: StudentCreate, db: AsyncSession = Depends(get_db)):
     db_student = Student(**student.dict())
@@ -18,31 +46,64 @@ async def create_student(student: StudentCreate, db: AsyncSession = Depends(get_
 
 @router.get("/", response_model=List[StudentSchema])
 async def list_students(
+    request: Request,
+    response: Response,
     filters: StudentFilter = Depends(),
     db: AsyncSession = Depends(get_db)
 ):
+    if filters.search and filters.cursor:
+        # Search results are ranked, not keyset ordered, so a cursor cannot apply
+        raise HTTPException(status_code=422, detail="cursor cannot be combined with search")
+
     query = select(Student)
+    if filters.stream:
+        query = select(*model_columns(Student, StudentSchema))
     
     if filters.department:
         query = query.filter(Student.department == filters.department)
     if filters.semester:
         query = query.filter(Student.semester == filters.semester)
+    
+    if filters.stream:
+        if filters.search:
+            query = query.filter(Student.search_text.ilike(contains_pattern(filters.search)))
+        return StreamingResponse(
+            stream_ndjson(query.order_by(Student.id)),
+            media_type=NDJSON_MEDIA_TYPE
+        )
+
     if filters.search:
-        query = query.filter(
-            or_(
-                Student.name.ilike(f"%{filters.search}%"),
-                Student.roll_number.ilike(f"%{filters.search}%"),
-                Student.phone.ilike(f"%{filters.search}%")
-            )
+        result = await db.execute(search_students(query, filters.search).limit(filters.limit))
+        students, next_cursor, prev_cursor = result.scalars().all(), None, None
+    else:
+        query, backwards = apply_keyset(query, (Student.id,), filters.limit, filters.cursor)
+        result = await db.execute(query)
+        students, next_cursor, prev_cursor = build_page(
+            result.scalars().all(),
+            key=lambda student: (student.id,),
+            limit=filters.limit,
+            backwards=backwards,
+            has_previous=bool(filters.cursor)
         )
-    
-    result = await db.execute(query)
-    return result.scalars().all()
+
+    # An unchanged page costs its query but no serialization or body
+    etag = page_etag("students", sorted(filters.model_dump().items()), students, next_cursor, prev_cursor)
+    if is_not_modified(request, etag, None):
+        unchanged = not_modified(etag, None)
+        set_cursor_headers(unchanged, next_cursor, prev_cursor)
+        return unchanged
+    set_validators(response, etag, None)
+    set_cursor_headers(response, next_cursor, prev_cursor)
+    return student_list_response(students, response)
 
 @router.get("/{student_id}", response_model=StudentSchema)
-async def get_student(student_id: int, db: AsyncSession = Depends(get_db)):
+async def get_student(student_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(Student).filter(Student.id == student_id))
     student = result.scalar_one_or_none()
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
+    etag, last_modified = row_validators("student", student.id, student.updated_at)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+    set_validators(response, etag, last_modified)
     return student 
\ No newline at end of file
@@ -1,56 +1,263 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from dataclasses import dataclass
 from datetime import datetime, timezone, timedelta
+from src.config import get_settings
 from src.db.session import AsyncSessionLocal
+from src.db.stats import refresh_stats
 from src.models.issue import Issue
+from src.models.issue_item import IssueItem
+from src.models.notification import Notification
 from src.models.student import Student
-from src.email_utils import send_email
-from sqlalchemy import select
+from src.email_utils import send_email_async, mail_configured
+from sqlalchemy import select, text, func, literal
+from sqlalchemy.dialects.postgresql import insert, aggregate_order_by
+import asyncio
 import logging
+import time
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-async def check_and_send_reminders():
+settings = get_settings()
+
+REMINDER_KIND = "due_reminder"
+
+CLAIM_NOTIFICATIONS = text("""
+    UPDATE notifications
+    SET attempts = attempts + 1, next_attempt_at = :lease_until, updated_at = :now
+    WHERE id IN (
+        SELECT id FROM notifications
+        WHERE status = 'pending' AND next_attempt_at <= :now
+        ORDER BY next_attempt_at
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, to_email, subject, body, attempts
+""")
+
+# One statement records the outcome of a whole batch; NULL keeps the
+# current next_attempt_at/sent_at
+FINISH_NOTIFICATIONS = text("""
+    UPDATE notifications AS n
+    SET status = u.status,
+        last_error = u.last_error,
+        sent_at = COALESCE(u.sent_at, n.sent_at),
+        next_attempt_at = COALESCE(u.next_attempt_at, n.next_attempt_at),
+        updated_at = :now
+    FROM unnest(
+        CAST(:ids AS INTEGER[]),
+        CAST(:statuses AS VARCHAR[]),
+        CAST(:errors AS VARCHAR[]),
+        CAST(:sent_at AS TIMESTAMP[]),
+        CAST(:next_attempt_at AS TIMESTAMP[])
+    ) AS u(id, status, last_error, sent_at, next_attempt_at)
+    WHERE n.id = u.id
+""")
+
+@dataclass
+class EnqueueStats:
+    due: int = 0
+    enqueued: int = 0
+    elapsed: float = 0.0
+
+@dataclass
+class DispatchStats:
+    claimed: int = 0
+    sent: int = 0
+    retrying: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def per_second(self) -> float:
+        return self.sent / self.elapsed if self.elapsed else 0.0
+
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def due_reminders_query(now: datetime):
+    """Active issues due within REMINDER_DAYS_AHEAD days, joined with their student."""
+    books_titles = (
+        select(func.string_agg(IssueItem.book_title, aggregate_order_by(literal(", "), IssueItem.book_title)))
+        .where(IssueItem.issue_id == Issue.id, IssueItem.returned_at == None)
+        .scalar_subquery()
+    )
+    return (
+        select(Issue.id, books_titles, Issue.return_date, Student.name, Student.email)
+        .join(Student, Student.id == Issue.student_id)
+        .where(
+            Issue.actual_return_date == None,
+            Issue.return_date >= now,
+            Issue.return_date < now + timedelta(days=settings.REMINDER_DAYS_AHEAD + 1)
+        )
+        .order_by(Issue.return_date)
+    )
+
+def reminder_message(name: str, books_titles: str, return_date: datetime, days_left: int):
+    subject = "Library Book Return Reminder"
+    body = (
+        f"Dear {name},\n\n"
+        f"This is a reminder that the book '{books_titles}' is due in {days_left} days "
+        f"(due date: {return_date.date()}).\n\n"
+        f"Please return the book on time to avoid any late fees.\n"
+        f"Thank you!"
+    )
+    return subject, body
+
+def lease_duration(batch_size: int) -> timedelta:
+    """How long a claimed batch stays hidden from other dispatchers.
+
+    The pool sends ``SMTP_POOL_SIZE`` messages at a time and each may take
+    up to two SMTP timeouts (a send plus one reconnect), so the lease must
+    outlast the slowest possible batch or another worker would send it again.
+    """
+    rounds = -(-batch_size // max(settings.SMTP_POOL_SIZE, 1))
+    worst_case = rounds * 2 * settings.SMTP_TIMEOUT
+    return timedelta(seconds=max(settings.NOTIFICATION_LEASE_SECONDS, worst_case))
+
+def retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=settings.NOTIFICATION_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+
+async def enqueue_reminders() -> EnqueueStats:
+    """Write today's due-date reminders to the notifications outbox.
+
+    Rows are inserted in batches with ON CONFLICT DO NOTHING on
+    (issue, kind, day), so rerunning the job never duplicates a reminder.
+    """
     logger.info("Starting reminder check...")
+    stats = EnqueueStats()
+    started = time.perf_counter()
+    now = utc_now()
+
     async with AsyncSessionLocal() as session:
-        # Get all active issues (not returned yet)
-        result = await session.execute(
-            select(Issue).where(Issue.actual_return_date == None)
-        )
-        issues = result.scalars().all()
-        
-        for issue in issues:
-            # Calculate days until return date
-            days_left = (issue.return_date - datetime.now(timezone.utc)).days
-            
-            # Send reminders for books due in 3 days or less
-            if days_left <= 3 and days_left >= 0:
-                student_result = await session.execute(
-                    select(Student).where(Student.id == issue.student_id)
-                )
-                student = student_result.scalar_one_or_none()
-                
-                if student:
-                    subject = "Library Book Return Reminder"
-                    body = (
-                        f"Dear {student.name},\n\n"
-                        f"This is a reminder that the book '{issue.book_title}' is due in {days_left} days "
-                        f"(due date: {issue.return_date.date()}).\n\n"
-                        f"Please return the book on time to avoid any late fees.\n"
-                        f"Thank you!"
-                    )
-                    try:
-                        send_email(student.email, subject, body)
-                        logger.info(f"Sent reminder to {student.email} for book '{issue.book_title}'")
-                    except Exception as e:
-                        logger.error(f"Failed to send email to {student.email}: {str(e)}")
-    
-    logger.info("Reminder check completed")
+        async def flush(rows):
+            result = await session.execute(
+                insert(Notification)
+                .values(rows)
+                .on_conflict_do_nothing(constraint="uq_notifications_issue_kind_date")
+            )
+            stats.enqueued += result.rowcount
+
+        rows = []
+        result = await session.stream(due_reminders_query(now).execution_options(yield_per=500))
+        async for issue_id, books_titles, return_date, name, email in result:
+            subject, body = reminder_message(name, books_titles, return_date, (return_date - now).days)
+            rows.append({
+                "issue_id": issue_id,
+                "kind": REMINDER_KIND,
+                "reminder_date": now.date(),
+                "to_email": email,
+                "subject": subject,
+                "body": body,
+                "status": "pending",
+                "attempts": 0,
+                "next_attempt_at": now,
+            })
+            stats.due += 1
+            if len(rows) >= settings.REMINDER_ENQUEUE_BATCH_SIZE:
+                await flush(rows)
+                rows = []
+        if rows:
+            await flush(rows)
+        await session.commit()
+
+    stats.elapsed = time.perf_counter() - started
+    logger.info(
+        f"Reminder check completed: {stats.due} due, {stats.enqueued} enqueued in {stats.elapsed:.2f}s"
+    )
+    return stats
+
+async def dispatch_notifications() -> DispatchStats:
+    """Deliver one batch of due outbox messages.
+
+    Messages are claimed with SKIP LOCKED and a lease, so several workers can
+    dispatch at once and a crash mid-send only delays a message. Failures are
+    retried with exponential backoff until NOTIFICATION_MAX_ATTEMPTS.
+    """
+    stats = DispatchStats()
+    if not mail_configured():
+        # Leave messages queued rather than burning their attempts
+        return stats
+    started = time.perf_counter()
+    now = utc_now()
+
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(CLAIM_NOTIFICATIONS, {
+            "now": now,
+            "lease_until": now + lease_duration(settings.NOTIFICATION_BATCH_SIZE),
+            "batch_size": settings.NOTIFICATION_BATCH_SIZE,
+        })
+        claimed = result.all()
+        await session.commit()
+    stats.claimed = len(claimed)
+    if not claimed:
+        return stats
+
+    # Concurrency is bounded by the SMTP connection pool
+    outcomes = await asyncio.gather(
+        *(send_email_async(row.to_email, row.subject, row.body) for row in claimed),
+        return_exceptions=True
+    )
+
+    finished = utc_now()
+    updates = {"ids": [], "statuses": [], "errors": [], "sent_at": [], "next_attempt_at": []}
+
+    def record(row, status, error=None, sent_at=None, next_attempt_at=None):
+        updates["ids"].append(row.id)
+        updates["statuses"].append(status)
+        updates["errors"].append(error)
+        updates["sent_at"].append(sent_at)
+        updates["next_attempt_at"].append(next_attempt_at)
+
+    for row, outcome in zip(claimed, outcomes):
+        if not isinstance(outcome, Exception):
+            record(row, "sent", sent_at=finished)
+            stats.sent += 1
+            continue
+        logger.error(f"Failed to send email to {row.to_email}: {str(outcome)}")
+        if row.attempts >= settings.NOTIFICATION_MAX_ATTEMPTS:
+            record(row, "failed", error=str(outcome))
+            stats.failed += 1
+        else:
+            record(row, "pending", error=str(outcome), next_attempt_at=finished + retry_delay(row.attempts))
+            stats.retrying += 1
+
+    async with AsyncSessionLocal() as session:
+        await session.execute(FINISH_NOTIFICATIONS, {"now": finished, **updates})
+        await session.commit()
+
+    stats.elapsed = time.perf_counter() - started
+    logger.info(
+        f"Dispatched {stats.claimed} notifications: {stats.sent} sent, {stats.retrying} retrying, "
+        f"{stats.failed} failed in {stats.elapsed:.2f}s ({stats.per_second:.1f} emails/s)"
+    )
+    return stats
+
+async def refresh_stats_job():
+    try:
+        elapsed = await refresh_stats()
+        logger.info(f"Refreshed stats views in {elapsed * 1000:.0f} ms")
+    except Exception as e:
+        logger.error(f"Error refreshing stats views: {str(e)}")
 
 def start_scheduler():
     scheduler = AsyncIOScheduler()
-    # Run the reminder check every day at 9 AM
-    scheduler.add_job(check_and_send_reminders, "cron", hour=9, minute=0)
+    # Queue reminders every day at 9 AM; the dispatcher delivers them in batches
+    scheduler.add_job(enqueue_reminders, "cron", hour=9, minute=0)
+    scheduler.add_job(
+        dispatch_notifications, "interval",
+        seconds=settings.NOTIFICATION_DISPATCH_SECONDS,
+        max_instances=1, coalesce=True
+    )
+    # Runs once at startup too, so the stats views are filled right away
+    scheduler.add_job(
+        refresh_stats_job, "interval",
+        seconds=settings.STATS_REFRESH_SECONDS,
+        next_run_time=datetime.now(),
+        max_instances=1, coalesce=True
+    )
     scheduler.start()
-    logger.info("Scheduler started - will check for reminders daily at 9 AM")
\ No newline at end of file
+    logger.info("Scheduler started - will check for reminders daily at 9 AM")
+    if not mail_configured():
+        logger.warning("SMTP credentials are not set; reminder emails stay queued until they are")
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Optional
 
 class BookBase(BaseModel):
     title: str
@@ -19,8 +19,36 @@ class Book(BookBase):
         from_attributes = True
 
 class BookFilter(BaseModel):
+    q: Optional[str] = None
     title: Optional[str] = None
     author: Optional[str] = None
     category: Optional[str] = None
     page: int = 1
-    limit: int = 10 
\ No newline at end of file
+    limit: int = 10
+    cursor: Optional[str] = None 
+
+# Largest value of the INTEGER columns
+MAX_INT4 = 2**31 - 1
+
+class BookImportRow(BookCreate):
+    isbn: str = Field(min_length=1)
+    copies: int = Field(ge=0, le=MAX_INT4)
+    book_description: Optional[str] = None
+
+    @field_validator("title", "author", "isbn", "category", "book_description")
+    @classmethod
+    def check_no_nul(cls, value):
+        # PostgreSQL text cannot hold NUL bytes
+        if value is not None and "\x00" in value:
+            raise ValueError("must not contain NUL characters")
+        return value
+
+class BookImportError(BaseModel):
+    line: int
+    error: str
+
+class BookImportResult(BaseModel):
+    inserted: int = 0
+    updated: int = 0
+    rejected: int = 0
+    errors: List[BookImportError] = []
\ No newline at end of file
@@ -0,0 +1,24 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Literal, Optional
+
+class ExportOptions(BaseModel):
+    format: Literal["csv", "ndjson"] = "csv"
+    gzip: bool = False
+
+class BookExportFilter(ExportOptions):
+    category: Optional[str] = None
+    author: Optional[str] = None
+
+class StudentExportFilter(ExportOptions):
+    department: Optional[str] = None
+    semester: Optional[int] = None
+
+class IssueExportFilter(ExportOptions):
+    # Issue date range, inclusive start and exclusive end
+    issued_from: Optional[datetime] = None
+    issued_to: Optional[datetime] = None
+    department: Optional[str] = None
+    student_id: Optional[int] = None
+    book_id: Optional[int] = None
+    status: Optional[Literal["out", "returned"]] = None
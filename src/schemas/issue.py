@@ -1,6 +1,6 @@
-from pydantic import BaseModel, model_validator
+from pydantic import BaseModel, Field, model_validator
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Literal, Optional
 from .book import Book as BookSchema
 from .student import Student as StudentSchema
 
@@ -61,4 +61,17 @@ class AdminIssue(Issue):
     days_overdue: Optional[int] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class BookHolder(BaseModel):
+    issue_id: int
+    student: StudentSchema
+    issue_date: datetime
+    return_date: datetime
+    is_overdue: bool
+
+class OverdueFilter(BaseModel):
+    sort: Literal["days_overdue", "student", "department"] = "days_overdue"
+    order: Literal["asc", "desc"] = "desc"
+    page: int = Field(1, ge=1)
+    limit: int = Field(50, ge=1, le=500)
\ No newline at end of file
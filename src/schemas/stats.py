@@ -0,0 +1,26 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Dict, List, Optional
+
+class CategoryStats(BaseModel):
+    category: Optional[str] = None
+    titles: int
+    total_copies: int
+    available_copies: int
+
+class DepartmentStats(BaseModel):
+    department: Optional[str] = None
+    students: int
+
+class LibraryStats(BaseModel):
+    books_by_category: List[CategoryStats]
+    students_by_department: List[DepartmentStats]
+    active_issues: int
+    books_out: int
+    overdue_issues: int
+    # When the underlying views were last refreshed
+    refreshed_at: Optional[datetime] = None
+
+class TableCounts(BaseModel):
+    exact: bool
+    record_counts: Dict[str, int]
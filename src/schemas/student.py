@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
 
 class StudentBase(BaseModel):
@@ -21,4 +21,8 @@ class Student(StudentBase):
 class StudentFilter(BaseModel):
     department: Optional[str] = None
     semester: Optional[int] = None
-    search: Optional[str] = None 
\ No newline at end of file
+    search: Optional[str] = None
+    limit: int = Field(100, ge=1, le=1000)
+    cursor: Optional[str] = None
+    # Stream every matching student as NDJSON instead of returning a page
+    stream: bool = False 
\ No newline at end of file
@@ -0,0 +1,59 @@
+import json
+from datetime import date, datetime
+from typing import Any, Iterable, List
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from .config import get_settings
+
+try:
+    import orjson
+except ImportError:  # optional: fall back to the standard library encoder
+    orjson = None
+
+settings = get_settings()
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson when it is installed."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def fast_json_enabled(router_name: str) -> bool:
+    return router_name in {name.strip() for name in settings.FAST_JSON_ROUTERS.split(",")}
+
+
+def fields_dict(obj, schema) -> dict:
+    """Read the fields of ``schema`` straight off an ORM object or row.
+
+    Skips Pydantic validation; only use it for data that was just loaded
+    from the database and already has the right types.
+    """
+    if isinstance(obj, dict):
+        return {field: obj[field] for field in schema.model_fields}
+    return {field: getattr(obj, field) for field in schema.model_fields}
+
+
+def fields_dicts(rows: Iterable, schema) -> List[dict]:
+    return [fields_dict(row, schema) for row in rows]
+
+
+def fast_json(content: Any, response: Response = None) -> FastJSONResponse:
+    """Wrap already-serializable content, keeping headers set on ``response``."""
+    headers = None
+    if response is not None:
+        headers = {key: value for key, value in response.headers.items() if key != "content-length"}
+    return FastJSONResponse(content, headers=headers)
@@ -0,0 +1,95 @@
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from typing import AsyncIterator, Sequence
+from fastapi.responses import StreamingResponse
+from .db.session import AsyncSessionLocal
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+CSV_MEDIA_TYPE = "text/csv"
+GZIP_MEDIA_TYPE = "application/gzip"
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def model_columns(model, schema) -> list:
+    """ORM columns backing the fields of a response schema."""
+    return [getattr(model, field) for field in schema.model_fields]
+
+
+async def stream_batches(query, batch_size: int = 500) -> AsyncIterator[list]:
+    """Yield the rows of a column ``select`` as lists of mappings.
+
+    Rows are read through a server-side cursor in a session owned by the
+    generator, so memory stays flat however large the result is.
+    """
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(query.execution_options(yield_per=batch_size))
+        async for rows in result.mappings().partitions():
+            yield rows
+
+
+async def stream_ndjson(query, batch_size: int = 500) -> AsyncIterator[bytes]:
+    """Yield the rows of a column ``select`` as NDJSON, one batch at a time."""
+    async for rows in stream_batches(query, batch_size):
+        yield "".join(
+            json.dumps(dict(row), default=_json_default) + "\n" for row in rows
+        ).encode()
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (list, tuple)):
+        return " ".join(str(item) for item in value)
+    return value
+
+
+async def stream_csv(query, columns: Sequence[str], batch_size: int = 500) -> AsyncIterator[bytes]:
+    """Yield the rows of a column ``select`` as CSV with a header line."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    async for rows in stream_batches(query, batch_size):
+        for row in rows:
+            writer.writerow([_csv_value(row[column]) for column in columns])
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # Header of an empty export
+        yield buffer.getvalue().encode()
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes], level: int = 6) -> AsyncIterator[bytes]:
+    """Compress a byte stream into a single gzip member as it is produced."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31 writes a gzip header
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_response(query, columns: Sequence[str], name: str, format: str, gzip: bool) -> StreamingResponse:
+    """Stream ``query`` as a CSV or NDJSON download, optionally gzipped."""
+    if format == "csv":
+        chunks, media_type = stream_csv(query, columns), CSV_MEDIA_TYPE
+    else:
+        chunks, media_type = stream_ndjson(query), NDJSON_MEDIA_TYPE
+    filename = f"{name}.{format}"
+    if gzip:
+        chunks, media_type, filename = gzip_chunks(chunks), GZIP_MEDIA_TYPE, filename + ".gz"
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -0,0 +1,64 @@
+import json
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import text
+from .conftest import api_client, run, unique
+
+
+def book_row(**overrides) -> dict:
+    row = {"title": unique("Book"), "author": "Test Author", "isbn": unique("isbn"), "copies": 1, "category": "Test"}
+    row.update(overrides)
+    return row
+
+
+@pytest.mark.parametrize("overrides", [
+    {"copies": 2**31},
+    {"copies": -1},
+    {"title": "bad\x00title"},
+    {"book_description": "\x00"},
+])
+def test_import_row_rejects_values_the_database_cannot_store(overrides):
+    from src.schemas.book import BookImportRow
+    with pytest.raises(ValidationError):
+        BookImportRow.model_validate(book_row(**overrides))
+
+
+def test_import_row_accepts_largest_copy_count():
+    from src.schemas.book import BookImportRow
+    assert BookImportRow.model_validate(book_row(copies=2**31 - 1)).copies == 2**31 - 1
+
+
+def test_rows_the_database_refuses_do_not_fail_their_batch(database, monkeypatch):
+    from src.db import book_import
+    from src.db.session import AsyncSessionLocal
+
+    monkeypatch.setattr(book_import.settings, "BOOK_IMPORT_BATCH_SIZE", 8)
+    rows = [book_row() for _ in range(10)]
+    # Lines 3 and 8 pass validation but break a constraint in the database
+    rows[2]["title"] = rows[7]["title"] = "REJECTED BY DATABASE"
+
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            await db.execute(text(
+                "ALTER TABLE books ADD CONSTRAINT test_import_reject CHECK (title <> 'REJECTED BY DATABASE')"
+            ))
+            await db.commit()
+        try:
+            async with api_client() as client:
+                response = await client.post(
+                    "/api/v1/books/import", content="\n".join(json.dumps(row) for row in rows).encode(),
+                    headers={"Content-Type": "application/x-ndjson"}
+                )
+        finally:
+            async with AsyncSessionLocal() as db:
+                await db.execute(text("ALTER TABLE books DROP CONSTRAINT test_import_reject"))
+                await db.commit()
+        return response
+
+    response = run(scenario)
+
+    assert response.status_code == 200
+    result = response.json()
+    assert (result["inserted"], result["rejected"]) == (8, 2)
+    assert [error["line"] for error in result["errors"]] == [3, 8]
+    assert all("test_import_reject" in error["error"] for error in result["errors"])
@@ -0,0 +1,135 @@
+import pytest
+from sqlalchemy import select, text
+from .conftest import api_client, create_book, create_students, run, unique
+
+
+def test_delete_book_with_circulation_history_conflicts(database):
+    from src.db.session import AsyncSessionLocal
+    from src.models.book import Book
+
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            issued = await create_book(db, 1)
+            unused = await create_book(db, 1)
+            student, = await create_students(db, 1)
+
+        async with api_client() as client:
+            issue = await client.post("/api/v1/issues/issue", json={"student_id": student.id, "book_id": issued.id})
+            conflict = await client.delete(f"/api/v1/books/{issued.id}")
+            deleted = await client.delete(f"/api/v1/books/{unused.id}")
+
+        async with AsyncSessionLocal() as db:
+            remaining = set((await db.execute(
+                select(Book.id).where(Book.id.in_([issued.id, unused.id]))
+            )).scalars())
+        return issue.status_code, conflict, deleted.status_code, remaining, issued.id
+
+    issue_status, conflict, deleted_status, remaining, issued_id = run(scenario)
+
+    assert issue_status == 201
+    assert conflict.status_code == 409
+    assert "circulation history" in conflict.json()["detail"]
+    assert deleted_status == 200
+    assert remaining == {issued_id}
+
+
+def test_issue_items_backfill_reports_missing_books(database):
+    from src.db.session import AsyncSessionLocal
+    from src.db.migrate_issue_items import migrate_issue_items, MissingBooksError
+
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            book = await create_book(db, 1)
+            student, = await create_students(db, 1)
+            missing_id = book.id + 1_000_000
+            # Recreate the pre-issue_items layout for one issue
+            await db.execute(text("ALTER TABLE issues ADD COLUMN book_ids INTEGER[]"))
+            issue_id = (await db.execute(text(
+                "INSERT INTO issues (student_id, issue_date, return_date, book_ids, created_at, updated_at) "
+                "VALUES (:student_id, now(), now() + interval '7 days', :book_ids, now(), now()) RETURNING id"
+            ), {"student_id": student.id, "book_ids": [book.id, missing_id]})).scalar()
+            await db.commit()
+
+        async with AsyncSessionLocal() as db:
+            with pytest.raises(MissingBooksError) as excinfo:
+                await migrate_issue_items(db)
+        async with AsyncSessionLocal() as db:
+            kept = (await db.execute(text(
+                "SELECT count(*) FROM information_schema.columns "
+                "WHERE table_name = 'issues' AND column_name = 'book_ids'"
+            ))).scalar()
+            inserted = await migrate_issue_items(db, skip_missing=True)
+            items = (await db.execute(text(
+                "SELECT book_id FROM issue_items WHERE issue_id = :issue_id"
+            ), {"issue_id": issue_id})).scalars().all()
+        return excinfo.value.missing, kept, inserted, items, issue_id, book.id, missing_id
+
+    missing, kept, inserted, items, issue_id, book_id, missing_id = run(scenario)
+
+    assert [tuple(row) for row in missing] == [(issue_id, missing_id)]
+    assert kept == 1
+    assert inserted >= 1
+    assert items == [book_id]
+
+
+def test_book_list_etag_changes_when_a_listed_book_is_deleted(database):
+    from src.db.session import AsyncSessionLocal
+    from src.models.book import Book
+
+    async def scenario():
+        category = unique("Category")
+        async with AsyncSessionLocal() as db:
+            books = [Book(
+                title=unique("Book"), author="Test Author", isbn=unique("isbn"),
+                copies=1, available_copies=1, category=category
+            ) for _ in range(3)]
+            db.add_all(books)
+            await db.commit()
+
+        async with api_client() as client:
+            url = f"/api/v1/books/?category={category}"
+            first = await client.get(url)
+            etag = first.headers["etag"]
+            unchanged = await client.get(url, headers={"If-None-Match": etag})
+            await client.delete(f"/api/v1/books/{books[1].id}")
+            after_delete = await client.get(url, headers={"If-None-Match": etag})
+        return first, unchanged, after_delete
+
+    first, unchanged, after_delete = run(scenario)
+
+    assert first.status_code == 200 and len(first.json()) == 3
+    assert "last-modified" not in first.headers
+    assert unchanged.status_code == 304
+    assert after_delete.status_code == 200 and len(after_delete.json()) == 2
+    assert after_delete.headers["etag"] != first.headers["etag"]
+
+
+def test_book_list_etag_changes_when_a_next_page_appears(database):
+    async def scenario():
+        category = unique("Category")
+
+        async def add_book(title):
+            response = await client.post("/api/v1/books/", json={
+                "title": title, "author": "Test Author", "isbn": unique("isbn"), "copies": 1, "category": category
+            })
+            response.raise_for_status()
+
+        async with api_client() as client:
+            await add_book("A first")
+            await add_book("B second")
+            url = f"/api/v1/books/?category={category}&limit=2"
+            first = await client.get(url)
+            # Sorts after the page, so the page itself is unchanged
+            await add_book("C third")
+            after_insert = await client.get(url, headers={"If-None-Match": first.headers["etag"]})
+            unchanged = await client.get(url, headers={"If-None-Match": after_insert.headers["etag"]})
+        return first, after_insert, unchanged
+
+    first, after_insert, unchanged = run(scenario)
+
+    assert "x-next-cursor" not in first.headers
+    assert after_insert.status_code == 200
+    assert [book["title"] for book in after_insert.json()] == ["A first", "B second"]
+    assert after_insert.headers["x-next-cursor"]
+    assert unchanged.status_code == 304
+    assert unchanged.headers["x-next-cursor"] == after_insert.headers["x-next-cursor"]
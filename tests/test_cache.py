@@ -0,0 +1,32 @@
+import asyncio
+from src.cache import InMemoryCache, book_key, book_list_key, invalidate_books
+import src.cache
+
+
+def test_late_store_after_invalidation_is_never_read(monkeypatch):
+    monkeypatch.setattr(src.cache, "cache", InMemoryCache())
+
+    async def scenario():
+        cache = src.cache.cache
+        # A reader misses and computes its keys before querying the database...
+        item_key, list_key = await book_key(1), await book_list_key({"page": 1})
+        # ...a writer commits and invalidates...
+        await invalidate_books([1])
+        # ...and the reader stores the row it read before the write
+        await cache.set(item_key, {"title": "old"})
+        await cache.set(list_key, ["old"])
+        return await cache.get(await book_key(1)), await cache.get(await book_list_key({"page": 1}))
+
+    assert asyncio.run(scenario()) == (None, None)
+
+
+def test_invalidation_leaves_other_books_cached(monkeypatch):
+    monkeypatch.setattr(src.cache, "cache", InMemoryCache())
+
+    async def scenario():
+        cache = src.cache.cache
+        await cache.set(await book_key(2), {"title": "kept"})
+        await invalidate_books([1])
+        return await cache.get(await book_key(2))
+
+    assert asyncio.run(scenario()) == {"title": "kept"}
@@ -0,0 +1,80 @@
+import asyncio
+from sqlalchemy import select
+from .conftest import api_client, create_book, create_students, run
+
+COPIES = 5
+CHECKOUTS = 20
+
+
+def test_concurrent_checkouts_never_oversell(database):
+    from src.db.session import AsyncSessionLocal
+    from src.models.book import Book
+
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            book = await create_book(db, COPIES)
+            students = await create_students(db, CHECKOUTS)
+
+        lowest = []
+        done = asyncio.Event()
+
+        async def watch_stock():
+            # Sample the shelf while the checkouts race
+            async with AsyncSessionLocal() as db:
+                while not done.is_set():
+                    lowest.append(await db.scalar(select(Book.available_copies).where(Book.id == book.id)))
+                    await db.rollback()
+                    await asyncio.sleep(0)
+
+        async with api_client() as client:
+            watcher = asyncio.create_task(watch_stock())
+            responses = await asyncio.gather(*(
+                client.post("/api/v1/issues/issue", json={"student_id": student.id, "book_id": book.id})
+                for student in students
+            ))
+            done.set()
+            await watcher
+
+        async with AsyncSessionLocal() as db:
+            remaining = await db.scalar(select(Book.available_copies).where(Book.id == book.id))
+        return [response.status_code for response in responses], remaining, lowest
+
+    statuses, remaining, lowest = run(scenario)
+
+    assert statuses.count(201) == COPIES
+    assert all(400 <= status < 500 for status in statuses if status != 201)
+    assert remaining == 0
+    assert min(lowest) >= 0
+
+
+def test_concurrent_returns_close_the_issue(database):
+    from src.db.session import AsyncSessionLocal
+    from src.models.issue import Issue
+
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            books = [await create_book(db, 1) for _ in range(2)]
+            students = await create_students(db, 5)
+
+        async with api_client() as client:
+            issue_ids = []
+            for student in students:
+                response = await client.post(
+                    "/api/v1/issues/issue",
+                    json={"student_id": student.id, "book_ids": [book.id for book in books]}
+                )
+                issue_ids.append(response.json()["id"])
+                # Both books of the issue come back at the same moment
+                returns = await asyncio.gather(*(
+                    client.put(f"/api/v1/issues/{issue_ids[-1]}/return/{book.id}") for book in books
+                ))
+                assert [r.status_code for r in returns] == [200, 200]
+
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(Issue.actual_return_date).where(Issue.id.in_(issue_ids)))
+            return result.scalars().all()
+
+    closed_at = run(scenario)
+
+    assert len(closed_at) == 5
+    assert all(value is not None for value in closed_at)
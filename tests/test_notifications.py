@@ -0,0 +1,62 @@
+from datetime import date, timedelta
+from sqlalchemy import select
+from .conftest import create_students, run
+
+
+def test_dispatch_records_every_outcome_in_one_batch(database, monkeypatch):
+    from src import scheduler
+    from src.db.session import AsyncSessionLocal
+    from src.models.issue import Issue
+    from src.models.notification import Notification
+
+    async def fake_send(to_email, subject, body):
+        if to_email.startswith("fail"):
+            raise ConnectionError("refused")
+
+    monkeypatch.setattr(scheduler, "send_email_async", fake_send)
+    monkeypatch.setattr(scheduler, "mail_configured", lambda: True)
+
+    async def scenario():
+        now = scheduler.utc_now()
+        async with AsyncSessionLocal() as db:
+            student, = await create_students(db, 1)
+            issue = Issue(student_id=student.id, issue_date=now, return_date=now + timedelta(days=2))
+            db.add(issue)
+            await db.flush()
+            rows = {
+                name: Notification(
+                    issue_id=issue.id, kind=name, reminder_date=date.today(), to_email=f"{name}@example.com",
+                    subject="Reminder", body="Due soon", attempts=attempts, next_attempt_at=now - timedelta(seconds=1)
+                )
+                for name, attempts in [("ok", 0), ("fail-retry", 0), ("fail-final", scheduler.settings.NOTIFICATION_MAX_ATTEMPTS - 1)]
+            }
+            db.add_all(rows.values())
+            await db.commit()
+            ids = {name: row.id for name, row in rows.items()}
+
+        stats = await scheduler.dispatch_notifications()
+
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(Notification).where(Notification.id.in_(ids.values())))
+            saved = {row.kind: row for row in result.scalars()}
+        return stats, saved, now
+
+    stats, saved, now = run(scenario)
+
+    assert (stats.sent, stats.retrying, stats.failed) == (1, 1, 1)
+    assert saved["ok"].status == "sent" and saved["ok"].sent_at is not None
+    assert saved["fail-retry"].status == "pending"
+    assert saved["fail-retry"].last_error == "refused"
+    assert saved["fail-retry"].next_attempt_at > now
+    assert saved["fail-final"].status == "failed" and saved["fail-final"].sent_at is None
+
+
+def test_lease_outlasts_the_slowest_batch(monkeypatch):
+    from src import scheduler
+
+    monkeypatch.setattr(scheduler.settings, "SMTP_POOL_SIZE", 2)
+    monkeypatch.setattr(scheduler.settings, "SMTP_TIMEOUT", 30)
+    monkeypatch.setattr(scheduler.settings, "NOTIFICATION_LEASE_SECONDS", 300)
+
+    assert scheduler.lease_duration(200) == timedelta(seconds=100 * 2 * 30)
+    assert scheduler.lease_duration(2) == timedelta(seconds=300)
@@ -0,0 +1,86 @@
+import base64
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+from src.models.book import Book
+from src.pagination import apply_keyset, build_page, decode_cursor, encode_cursor
+
+
+def _sql(query) -> str:
+    return str(query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+@pytest.mark.parametrize("key, direction", [
+    (["Dune", 7], "next"),
+    (["2024-01-02T03:04:05", 1], "prev"),
+    ([None, "ünïcode ' \" /+"], "next"),
+])
+def test_cursor_round_trips(key, direction):
+    cursor = encode_cursor(key, direction)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (key, direction)
+
+
+def _raw(payload: str) -> str:
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor!",
+    "abc",
+    _raw("not json"),
+    _raw('{"k": [1]}'),
+    _raw('{"k": 1, "d": "next"}'),
+    _raw('{"k": [1], "d": "sideways"}'),
+    _raw("[1, 2]"),
+])
+def test_malformed_cursors_are_rejected(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+    assert error.value.status_code == 400
+
+
+def test_apply_keyset_without_cursor_orders_and_looks_ahead():
+    query, backwards = apply_keyset(select(Book), [Book.title, Book.id], limit=10)
+    sql = _sql(query)
+    assert not backwards
+    assert "WHERE" not in sql
+    assert "ORDER BY books.title ASC, books.id ASC" in sql
+    assert sql.endswith("LIMIT 11")
+
+
+def test_apply_keyset_continues_after_the_cursor():
+    query, backwards = apply_keyset(select(Book), [Book.title, Book.id], 10, encode_cursor(["Dune", 7]))
+    sql = _sql(query)
+    assert not backwards
+    assert "(books.title, books.id) > ('Dune', 7)" in sql
+    assert "ORDER BY books.title ASC, books.id ASC" in sql
+
+
+def test_apply_keyset_runs_backwards_for_prev_cursors():
+    query, backwards = apply_keyset(select(Book), [Book.title, Book.id], 10, encode_cursor(["Dune", 7], "prev"))
+    sql = _sql(query)
+    assert backwards
+    assert "(books.title, books.id) < ('Dune', 7)" in sql
+    assert "ORDER BY books.title DESC, books.id DESC" in sql
+
+
+def test_apply_keyset_rejects_cursors_for_other_columns():
+    with pytest.raises(HTTPException) as error:
+        apply_keyset(select(Book), [Book.title, Book.id], 10, encode_cursor([7]))
+    assert error.value.status_code == 400
+
+
+def test_build_page_trims_the_look_ahead_row():
+    rows, next_cursor, prev_cursor = build_page([1, 2, 3], lambda row: [row], limit=2)
+    assert rows == [1, 2]
+    assert decode_cursor(next_cursor) == ([2], "next")
+    assert prev_cursor is None
+
+
+def test_build_page_restores_order_when_backwards():
+    rows, next_cursor, prev_cursor = build_page([5, 4, 3], lambda row: [row], limit=2, backwards=True)
+    assert rows == [4, 5]
+    assert decode_cursor(next_cursor) == ([5], "next")
+    assert decode_cursor(prev_cursor) == ([4], "prev")
@@ -0,0 +1,34 @@
+import pytest
+from src.db.profiler import normalize_sql
+
+
+@pytest.mark.parametrize("statement, shape", [
+    ("SELECT * FROM books WHERE title = 'Dune' AND copies > 3",
+     "SELECT * FROM books WHERE title = ? AND copies > ?"),
+    ("SELECT * FROM books WHERE title = 'It''s'", "SELECT * FROM books WHERE title = ?"),
+    ("SELECT * FROM books WHERE price < -2.5", "SELECT * FROM books WHERE price < ?"),
+    ("SELECT * FROM books WHERE id = $1 LIMIT $2", "SELECT * FROM books WHERE id = ? LIMIT ?"),
+    ("SELECT * FROM books WHERE id = %(id_1)s", "SELECT * FROM books WHERE id = ?"),
+    ("SELECT * FROM books WHERE id = %s", "SELECT * FROM books WHERE id = ?"),
+    ("SELECT *\n  FROM   books\n\tWHERE id = 1 ", "SELECT * FROM books WHERE id = ?"),
+])
+def test_literals_and_bind_parameters_become_placeholders(statement, shape):
+    assert normalize_sql(statement) == shape
+
+
+def test_identifiers_with_digits_are_kept():
+    sql = "SELECT t1.col2, books_2.id FROM books AS books_2 WHERE t1.x = $3"
+    assert normalize_sql(sql) == "SELECT t1.col2, books_2.id FROM books AS books_2 WHERE t1.x = ?"
+
+
+def test_in_lists_of_any_length_share_a_shape():
+    short = normalize_sql("SELECT * FROM books WHERE id IN (1, 2)")
+    long = normalize_sql("SELECT * FROM books WHERE id IN ($1, $2, $3, $4, $5)")
+    assert short == long == "SELECT * FROM books WHERE id IN (?...)"
+
+
+def test_multi_row_values_share_a_shape():
+    one = normalize_sql("INSERT INTO books (title, copies) VALUES ('a', 1)")
+    three = normalize_sql("INSERT INTO books (title, copies) VALUES ($1, $2), ($3, $4), ($5, $6)")
+    assert three == "INSERT INTO books (title, copies) VALUES (?...), ..."
+    assert one == "INSERT INTO books (title, copies) VALUES (?...)"
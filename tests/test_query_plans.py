@@ -0,0 +1,53 @@
+"""The hot issue queries must be able to use their indexes.
+
+Sequential scans are disabled so the planner's choice does not depend on
+how many rows the test database holds: if the expected index cannot serve
+the query at all, the plan falls back to a (penalised) sequential scan.
+"""
+import pytest
+from sqlalchemy import text
+from .conftest import run
+
+
+async def explain(db, query) -> str:
+    from src.db.session import engine
+    compiled = query.compile(dialect=engine.dialect)
+    params = [compiled.params[name] for name in compiled.positiontup]
+    await db.execute(text("SET LOCAL enable_seqscan = off"))
+    connection = await (await db.connection()).get_raw_connection()
+    rows = await connection.driver_connection.fetch(f"EXPLAIN {compiled}", *params)
+    return "\n".join(row[0] for row in rows)
+
+
+def plan_for(build_query) -> str:
+    from src.db.session import AsyncSessionLocal
+
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            return await explain(db, build_query())
+
+    return run(scenario)
+
+
+@pytest.mark.parametrize("sort", ["days_overdue", "student"])
+def test_overdue_report_uses_open_issue_index(database, sort):
+    from src.routers.issues import overdue_query
+    from src.scheduler import utc_now
+    from src.schemas.issue import OverdueFilter
+
+    plan = plan_for(lambda: overdue_query(utc_now(), OverdueFilter(sort=sort)))
+    assert "ix_issues_open_return_date" in plan, plan
+
+
+def test_reminder_query_uses_open_issue_index(database):
+    from src.scheduler import due_reminders_query, utc_now
+
+    plan = plan_for(lambda: due_reminders_query(utc_now()))
+    assert "ix_issues_open_return_date" in plan, plan
+
+
+def test_student_history_uses_student_index(database):
+    from src.routers.issues import student_history_query
+
+    plan = plan_for(lambda: student_history_query(1))
+    assert "ix_issues_student_issue_date" in plan, plan